@@ -21,7 +21,10 @@ import sys
 import time
 import inspect
 import logging
+import threading
 import traceback
+import collections
+from itertools import groupby
 from functools import partial
 
 import tank
@@ -51,6 +54,22 @@ SHOW_COMP_DLG = "SGTK_COMPATIBILITY_DIALOG_SHOWN"
 # own risk if needed.
 MIN_COMPATIBILITY_VERSION = 0.59
 
+# interval in milliseconds of the safety net check for the active document
+# changing, most changes are notified by Gaffer straight away.
+ACTIVE_DOC_CHECK_INTERVAL = 10000
+
+# log messages are buffered and written to the Gaffer log in batches. A batch
+# is written LOG_FLUSH_INTERVAL milliseconds after its first message, or
+# straight away if it grows over any of the following limits or an error is
+# logged.
+LOG_FLUSH_INTERVAL = 50
+LOG_FLUSH_MAX_RECORDS = 100
+LOG_FLUSH_MAX_BYTES = 64 * 1024
+
+# maximum time in milliseconds Gaffer waits for the Shotgun menu to be
+# created before giving up and showing an empty menu.
+MENU_READY_TIMEOUT = 30000
+
 # this is a place to put our persistent variables between different documents
 # opened
 if not hasattr(Gaffer, "shotgun"):
@@ -69,81 +88,172 @@ def is_batch_mode():
 
 
 # logging functionality
-def show_error(msg):
-    from PySide2.QtWidgets import QMessageBox
 
-    if not is_batch_mode():
-        QMessageBox.critical(None, "Shotgun Error | %s engine" % APPLICATION_NAME, msg)
-    else:
-        display_error(msg)
+# QMessageBox class, imported the first time a message box is shown
+_QMessageBox = None
 
+# message box to use for each severity and its title
+_MESSAGE_BOXES = {
+    "error": ("critical", "Shotgun Error | %s engine" % APPLICATION_NAME),
+    "warning": ("warning", "Shotgun Warning | %s engine" % APPLICATION_NAME),
+    "info": ("information", "Shotgun Info | %s engine" % APPLICATION_NAME),
+}
 
-def show_warning(msg):
-    from PySide2.QtWidgets import QMessageBox
 
-    if not is_batch_mode():
-        QMessageBox.warning(None, "Shotgun Warning | %s engine" % APPLICATION_NAME, msg)
-    else:
-        display_warning(msg)
+def _get_message_box_class():
+    global _QMessageBox
+
+    if _QMessageBox is None:
+        from PySide2.QtWidgets import QMessageBox
 
+        _QMessageBox = QMessageBox
+    return _QMessageBox
 
-def show_info(msg):
-    from PySide2.QtWidgets import QMessageBox
 
+def _show(severity, msg):
+    """
+    Shows the message in a message box for the given severity, one of
+    "error", "warning" or "info", or displays it in the Gaffer log when
+    running in batch mode.
+    """
     if not is_batch_mode():
-        QMessageBox.information(
-            None, "Shotgun Info | %s engine" % APPLICATION_NAME, msg
-        )
+        kind, title = _MESSAGE_BOXES[severity]
+        getattr(_get_message_box_class(), kind)(None, title, msg)
     else:
-        display_info(msg)
+        _display(severity, msg)
+
+
+show_error = partial(_show, "error")
+show_warning = partial(_show, "warning")
+show_info = partial(_show, "info")
 
 
 # from python 2.x string module. This will be removed as soon
 # as a bug in IECore.Log with Python3 (at least in Windows OS) is
-# solved (it tries to use the string.join method that is deprecated):
+# solved (it tries to use the string.join method that is deprecated).
+# Python 2 still has its own string.join so leave that one alone.
+if hasattr(IECore.Log, "string") and not hasattr(IECore.Log.string, "join"):
+    IECore.Log.string.join = lambda words, sep=" ": sep.join(words)
+
+
+# last timestamp string used by the display functions and the second it was
+# generated for, so it is only formatted once per second.
+_timestamp_cache = [None, ""]
 
-# Join fields with optional separator
-def join(words, sep=" "):
-    """join(list [,sep]) -> string
 
-    Return a string composed of the words in list, with
-    intervening occurrences of sep.  The default separator is a
-    single space.
+def _asctime_now():
+    """
+    Returns the current local time formatted with time.asctime, reusing the
+    last formatted string if we are still within the same second.
+    """
+    now = int(time.time())
+    if now != _timestamp_cache[0]:
+        _timestamp_cache[1] = time.asctime(time.localtime(now))
+        _timestamp_cache[0] = now
+    return _timestamp_cache[1]
+
+
+# whether debug messages are displayed, read from the TK_DEBUG environment
+# variable when the module is loaded and when the engine starts up.
+_TK_DEBUG = os.environ.get("TK_DEBUG") == "1"
 
-    (joinfields and join are synonymous)
 
+def _refresh_debug_flag():
     """
-    return sep.join(words)
+    Updates the debug flag from the TK_DEBUG environment variable.
+    """
+    global _TK_DEBUG
 
+    _TK_DEBUG = os.environ.get("TK_DEBUG") == "1"
 
-if hasattr(IECore.Log, "string"):
-    IECore.Log.string.join = join
 
+# label and IECore.Log function to use for each severity, and whether the
+# message should also be printed to the console
+_DISPLAYS = {
+    "error": ("Error", IECore.Log.error, True),
+    "warning": ("Warning", IECore.Log.warning, False),
+    "info": ("Information", IECore.Log.info, False),
+    "debug": ("Debug", IECore.Log.debug, False),
+}
 
-def display_error(msg):
-    t = time.asctime(time.localtime())
-    message = "%s - Shotgun Error | %s engine | %s " % (t, APPLICATION_NAME, msg)
-    IECore.Log.error(message)
-    print(message)
 
+def _display(severity, msg):
+    """
+    Displays the message in the Gaffer log with the given severity, one of
+    "error", "warning", "info" or "debug".
+    """
+    if severity == "debug" and not _TK_DEBUG:
+        return
+
+    label, log_fct, echo = _DISPLAYS[severity]
+    message = "%s - Shotgun %s | %s engine | %s " % (
+        _asctime_now(),
+        label,
+        APPLICATION_NAME,
+        msg,
+    )
+    log_fct(message)
+    if echo:
+        print(message)
+
+
+display_error = partial(_display, "error")
+display_warning = partial(_display, "warning")
+display_info = partial(_display, "info")
+display_debug = partial(_display, "debug")
 
-def display_warning(msg):
-    t = time.asctime(time.localtime())
-    message = "%s - Shotgun Warning | %s engine | %s " % (t, APPLICATION_NAME, msg)
-    IECore.Log.warning(message)
 
+# Give a standard format to the log messages:
+#     Shotgun <basename>: <message>
+# where "basename" is the leaf part of the logging record name,
+# for example "tk-multi-shotgunpanel" or "qt_importer".
+_DEBUG_FORMATTER = logging.Formatter("Debug: Shotgun %(basename)s: %(message)s")
+_FORMATTER = logging.Formatter("Shotgun %(basename)s: %(message)s")
 
-def display_info(msg):
-    t = time.asctime(time.localtime())
-    message = "%s - Shotgun Information | %s engine | %s " % (t, APPLICATION_NAME, msg)
-    IECore.Log.info(message)
+# Gaffer display function and formatter to use for each logging level, from
+# the highest level to the lowest one.
+_LOG_LEVEL_DISPATCH = (
+    (logging.ERROR, display_error, _FORMATTER),
+    (logging.WARNING, display_warning, _FORMATTER),
+    (logging.INFO, display_info, _FORMATTER),
+    (logging.NOTSET, display_debug, _DEBUG_FORMATTER),
+)
 
 
-def display_debug(msg):
-    if os.environ.get("TK_DEBUG") == "1":
-        t = time.asctime(time.localtime())
-        message = "%s - Shotgun Debug | %s engine | %s " % (t, APPLICATION_NAME, msg)
-        IECore.Log.debug(message)
+# sgtk instances found for the folders documents have been opened from, so
+# switching between documents of the same folder does not need to resolve
+# the pipeline configuration again.
+SGTK_CACHE_SIZE = 32
+_sgtk_instances = collections.OrderedDict()
+
+# contexts extracted from the documents paths, so refreshing the engine for
+# a document we already know about does not need to resolve it again.
+CONTEXT_CACHE_SIZE = 64
+_path_contexts = collections.OrderedDict()
+
+
+def _cache_value(cache, key, value, max_size):
+    """
+    Stores the value in the given OrderedDict cache as its most recently
+    used entry, discarding the least recently used ones over max_size.
+    """
+    cache.pop(key, None)
+    cache[key] = value
+    while len(cache) > max_size:
+        cache.popitem(last=False)
+
+
+def _sgtk_from_folder(folder):
+    """
+    Returns the sgtk instance for the given folder, reusing the one found
+    the last time the same folder was queried.
+    """
+    tk = _sgtk_instances.get(folder)
+    if tk is None:
+        tk = tank.sgtk_from_path(folder)
+
+    _cache_value(_sgtk_instances, folder, tk, SGTK_CACHE_SIZE)
+    return tk
 
 
 # methods to support the state when the engine cannot start up
@@ -185,16 +295,24 @@ def refresh_engine():
     # active document
     current_context = tank.platform.current_engine().context
 
+    # nothing to do if we already know the document belongs to the current
+    # context
+    cached_ctx = _path_contexts.get(active_doc_path)
+    if cached_ctx is not None and cached_ctx == current_context:
+        logger.debug("Active document matches the current context already.")
+        return
+
     ctx = current_context
 
     # this file could be in another project altogether, so create a new
     # API instance.
     try:
         # and construct the new context for this path:
-        tk = tank.sgtk_from_path(active_doc_path)
-        logger.debug(
-            "Extracted sgtk instance: '%r' from path: '%r'", tk, active_doc_path
-        )
+        tk = _sgtk_from_folder(os.path.dirname(active_doc_path))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Extracted sgtk instance: '%r' from path: '%r'", tk, active_doc_path
+            )
 
     except tank.TankError:
         # could not detect context from path, will use the project context
@@ -209,11 +327,12 @@ def refresh_engine():
         return
 
     ctx = tk.context_from_path(active_doc_path, current_context)
-    logger.debug(
-        "Given the path: '%s' the following context was extracted: '%r'",
-        active_doc_path,
-        ctx,
-    )
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Given the path: '%s' the following context was extracted: '%r'",
+            active_doc_path,
+            ctx,
+        )
 
     # default to project context in worse case scenario
     if not ctx:
@@ -228,8 +347,11 @@ def refresh_engine():
             ctx,
         )
 
+    _cache_value(_path_contexts, active_doc_path, ctx, CONTEXT_CACHE_SIZE)
+
     # Only change if the context is different
     if ctx != current_context:
+        engine._changing_context_from_document = True
         try:
             engine.change_context(ctx)
         except tank.TankError:
@@ -240,6 +362,8 @@ def refresh_engine():
             )
             display_warning(message)
             engine.create_shotgun_menu(disabled=True)
+        finally:
+            engine._changing_context_from_document = False
 
 
 class GafferEngine(Engine):
@@ -247,17 +371,41 @@ class GafferEngine(Engine):
     Toolkit engine for Gaffer.
     """
 
+    # information about the application hosting the engine, see host_info
+    _host_info = None
+
     def __init__(self, *args, **kwargs):
         """
         Engine Constructor
         """
-        self._dock_widgets = []
+        # the application cannot switch between batch and UI mode while
+        # running, so only check it once
+        self._has_ui = not is_batch_mode()
+        self._dock_widgets = collections.OrderedDict()
         self._script = None
+        self._last_seen_filename = None
+        self._plug_set_connection = None
+
+        # always stored as an absolute path, so checking if the active
+        # document changed is a plain string comparison
+        self.active_document_filename = "untitled"
+        self._scripts = None
+        self._script_added_connection = None
+        self._pending_menu = None
+        self._changing_context_from_document = False
         self._application = None
         self._application_menu = None
         self._script_window = None
         self._menu_generator = None
         self._creating_menu = False
+        self._menu_ready_loops = []
+
+        # the engine logs before it is fully initialized, so the log buffer
+        # needs to exist before calling the base class constructor
+        self._log_buffer = collections.deque()
+        self._log_buffer_size = 0
+        self._log_lock = threading.Lock()
+        self._log_buffering = False
         Engine.__init__(self, *args, **kwargs)
 
     def set_script_window(self, script_window):
@@ -268,14 +416,85 @@ class GafferEngine(Engine):
         self.logger.debug("setting application: %s", application)
         self._application = application
 
+        # we get either the Gaffer application or its root depending on who
+        # is calling, either way what we are interested in are the scripts.
+        if not isinstance(application, Gaffer.ApplicationRoot):
+            application = application.root()
+        scripts = application["scripts"]
+
+        # get notified when a new script is added so a pending menu can be
+        # created as soon as there is a script for it.
+        if self._scripts is None or not scripts.isSame(self._scripts):
+            self._scripts = scripts
+            self._script_added_connection = scripts.childAddedSignal().connect(
+                self._on_script_added
+            )
+
+    def _on_script_added(self, parent, script):
+        """
+        Creates the Shotgun menu if it was waiting for a script to be added.
+        """
+        if self._pending_menu is not None:
+            self.set_active_script(script)
+
     def set_application_menu(self, application_menu):
         self.logger.debug("setting application menu: %s", application_menu)
         self._application_menu = application_menu
 
     def set_active_script(self, script):
         self.logger.debug("setting script: %s", script)
+        if self._script is None or script is None or not script.isSame(self._script):
+            self._set_active_script(script)
+
+        # the menu might have been waiting for a script to be available.
+        # Give the caller the chance to finish setting up the engine first.
+        if self._pending_menu is not None:
+            from sgtk.platform.qt import QtCore
+
+            QtCore.QTimer.singleShot(0, self._create_pending_menu)
+
+    def _create_pending_menu(self):
+        """
+        Creates the Shotgun menu if it was waiting for a script to be available.
+        """
+        if self._pending_menu is not None:
+            self.create_shotgun_menu(**self._pending_menu)
+
+    def _set_active_script(self, script):
+        """
+        Makes the given script the one the engine operates on.
+        """
         self._script = script
 
+        # force the next document check to look at the new script filename
+        self._last_seen_filename = None
+
+        # get notified when the script filename changes instead of waiting
+        # for the active doc timer to pick it up.
+        if self._plug_set_connection is not None:
+            self._plug_set_connection.disconnect()
+            self._plug_set_connection = None
+
+        if script is not None:
+            self._plug_set_connection = script.plugSetSignal().connect(
+                self._on_script_plug_set
+            )
+
+    def _on_script_plug_set(self, plug):
+        """
+        Checks if the active document changed when the filename plug of the
+        active script is set.
+        """
+        if not self._script or not plug.isSame(self._script["fileName"]):
+            return
+
+        from sgtk.platform.qt import QtCore
+
+        # the filename is set before the script is written to disk when
+        # saving, so defer the check until the current operation is done.
+        # Gaffer emits the signal in the main thread already.
+        QtCore.QTimer.singleShot(0, self.check_if_document_changed)
+
     @property
     def script_window(self):
         return self._script_window
@@ -320,13 +539,19 @@ class GafferEngine(Engine):
             }
         """
 
-        host_info = {"name": APPLICATION_NAME, "version": "unknown"}
-        try:
-            host_info["version"] = Gaffer.About.versionString()
-        except Exception:
-            # Fallback to 'Gaffer' initialized above
-            pass
-        return host_info
+        # the version cannot change while running, so only query it once.
+        # Callers get their own copy, so changing it does not affect others
+        if GafferEngine._host_info is None:
+            host_info = {"name": APPLICATION_NAME, "version": "unknown"}
+            try:
+                host_info["version"] = Gaffer.About.versionString()
+            except Exception:
+                # Fallback to 'Gaffer' initialized above
+                pass
+
+            GafferEngine._host_info = host_info
+
+        return dict(GafferEngine._host_info)
 
     def check_if_document_changed(self):
         """
@@ -342,15 +567,26 @@ class GafferEngine(Engine):
             return
 
         active_document_filename = self._script["fileName"].getValue()
+
+        # reading the plug is cheap, only hit the file system when the
+        # filename has changed since the last time we checked
+        if active_document_filename == self._last_seen_filename:
+            return
+
         if not os.path.exists(active_document_filename):
             return
 
-        if os.path.abspath(self.active_document_filename) != active_document_filename:
-            self.logger.debug(
-                "Active document changed from: %s to: %s"
-                % (self.active_document_filename, active_document_filename)
-            )
-            self.active_document_filename = os.path.abspath(active_document_filename)
+        self._last_seen_filename = active_document_filename
+        active_document_filename = os.path.abspath(active_document_filename)
+
+        if self.active_document_filename != active_document_filename:
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(
+                    "Active document changed from: %s to: %s",
+                    self.active_document_filename,
+                    active_document_filename,
+                )
+            self.active_document_filename = active_document_filename
             refresh_engine()
 
     def _on_active_doc_timer(self):
@@ -367,24 +603,31 @@ class GafferEngine(Engine):
         """
         from tank.platform.qt import QtCore
 
+        # pick up TK_DEBUG in case it was changed after loading this module
+        _refresh_debug_flag()
+
         # unicode characters returned by the shotgun api need to be converted
         # to display correctly in all of the app windows
-        # tell QT to interpret C strings as utf-8
-        utf8 = QtCore.QTextCodec.codecForName("utf-8")
-        QtCore.QTextCodec.setCodecForCStrings(utf8)
-        self.logger.debug("set utf-8 codec for widget text")
-
-        # We use a timer instead of the notifier API as the API does not
-        # inform us when the user changes views, only when they are created
-        # cloned, or closed.
+        # tell QT to interpret C strings as utf-8. Only Qt4 needs this, Qt5
+        # always uses utf-8 and no longer provides setCodecForCStrings.
+        if hasattr(QtCore.QTextCodec, "setCodecForCStrings"):
+            utf8 = QtCore.QTextCodec.codecForName("utf-8")
+            QtCore.QTextCodec.setCodecForCStrings(utf8)
+            self.logger.debug("set utf-8 codec for widget text")
+
+        # Changes to the filename of the active script are picked up from the
+        # script plugSetSignal, this timer is only a safety net in case a
+        # change is missed, for example a script saved to a new location.
+        # The timers are created here, in the main thread, so their timeouts
+        # are already executed in the main thread.
         # Since the restart of the engine every time a view is chosen is an
         # expensive operation, we will offer this functionality as am option
         # inside the context menu.
-        self.active_document_filename = "untitled"
         self.active_doc_timer = QtCore.QTimer()
-        self.active_doc_timer.timeout.connect(
-            partial(self.async_execute_in_main_thread, self._on_active_doc_timer)
-        )
+        self.active_doc_timer.timeout.connect(self._on_active_doc_timer)
+
+        # Qt is ready to defer the writing of the log messages from now on
+        self._log_buffering = True
 
     def init_engine(self):
         """
@@ -477,9 +720,7 @@ class GafferEngine(Engine):
         Returns the menu definition for Gaffer to use.
         :return: MenuDefinition
         """
-        from sgtk.platform.qt import QtGui
-
-        app = QtGui.QApplication.instance()
+        from sgtk.platform.qt import QtCore
 
         # We need to cater for when the application is loading
         # and we do not have a menu ready. Also for when there
@@ -489,18 +730,49 @@ class GafferEngine(Engine):
         # context in some cases.
         self.check_if_document_changed()
 
-        show_warning = False
-        start_time = time.time()
-        while self._creating_menu or not self._menu_generator:
-            if (time.time() - start_time) > 1.5 and not show_warning:
-                show_warning = True
-                self.show_busy(
-                    "Shotgun Engine", "\nRefreshing Shotgun Menu\n\nPlease wait...\n"
+        if self._creating_menu or not self._menu_generator:
+            # let the user know what is going on if the menu takes a while
+            busy_timer = QtCore.QTimer()
+            busy_timer.setSingleShot(True)
+            busy_timer.timeout.connect(
+                partial(
+                    self.show_busy,
+                    "Shotgun Engine",
+                    "\nRefreshing Shotgun Menu\n\nPlease wait...\n",
                 )
-            app.processEvents()
+            )
+            busy_timer.start(1500)
+
+            # wait for the menu without spinning, create_shotgun_menu will
+            # quit the event loops of all the callers waiting for it as soon
+            # as the menu is ready. Each call gets its own loop, as another
+            # menu can be requested from within this one.
+            menu_ready_loop = QtCore.QEventLoop()
+            timeout_timer = QtCore.QTimer()
+            timeout_timer.setSingleShot(True)
+            timeout_timer.timeout.connect(menu_ready_loop.quit)
+            timeout_timer.start(MENU_READY_TIMEOUT)
+
+            self._menu_ready_loops.append(menu_ready_loop)
+            try:
+                while self._creating_menu or not self._menu_generator:
+                    if not timeout_timer.isActive():
+                        break
+                    menu_ready_loop.exec_()
+            finally:
+                self._menu_ready_loops.remove(menu_ready_loop)
+                timeout_timer.stop()
+
+            busy_timer.stop()
 
         self.clear_busy()
 
+        if not self._menu_generator:
+            self.logger.warning(
+                "Timed out waiting for the %s menu to be created.", self._menu_name
+            )
+            return IECore.MenuDefinition()
+
         return self._menu_generator.get_menu_definition()
 
     def create_shotgun_menu(self, disabled=False):
@@ -517,20 +789,25 @@ class GafferEngine(Engine):
             tk_gaffer = self.import_module("tk_gaffer")
             if tk_gaffer.can_create_menu(self._script):
                 self.logger.debug("Creating shotgun menu...")
+                self._pending_menu = None
                 self._creating_menu = True
                 self._menu_generator = tk_gaffer.MenuGenerator(self, self._menu_name)
                 self._menu_generator.create_menu(disabled=disabled)
                 self._creating_menu = False
 
+                # wake up all the get_menu calls waiting for the menu
+                for menu_ready_loop in self._menu_ready_loops:
+                    menu_ready_loop.quit()
+
                 # monitor for document changes
                 self.logger.debug("%s: Starting active doc timer...", self)
-                self.active_doc_timer.start(1000)
+                self.active_doc_timer.start(ACTIVE_DOC_CHECK_INTERVAL)
 
             else:
+                # the menu will be created once there is a script available,
+                # see set_active_script and _on_script_added
                 self.logger.debug("Waiting for menu to be created...")
-                from sgtk.platform.qt import QtCore
-
-                QtCore.QTimer.singleShot(200, self.create_shotgun_menu)
+                self._pending_menu = {"disabled": disabled}
             return True
 
         return False
@@ -564,6 +841,13 @@ class GafferEngine(Engine):
         :param new_context: The new context being changed to.
         """
 
+        # a context change that does not come from the active document, for
+        # example one done by an app, might follow a pipeline configuration
+        # change, so do not trust the sgtk instances and contexts found so far
+        if not self._changing_context_from_document:
+            _sgtk_instances.clear()
+            _path_contexts.clear()
+
         if self.get_setting("automatic_context_switch", True):
             # finally create the menu with the new context if needed
             if old_context != new_context:
@@ -576,12 +860,21 @@ class GafferEngine(Engine):
         'run_at_startup' setting of the environment configuration YAML file.
         """
 
+        run_at_startup = self.get_setting("run_at_startup", [])
+        if not run_at_startup:
+            return
+
+        # only the app instances requested at startup are of interest
+        wanted_app_instances = set(
+            app_setting_dict["app_instance"] for app_setting_dict in run_at_startup
+        )
+
         # Build a dictionary mapping app instance names to dictionaries of
         # commands they registered with the engine.
         app_instance_commands = {}
-        for (cmd_name, value) in list(self.commands.items()):
+        for cmd_name, value in self.commands.items():
             app_instance = value["properties"].get("app")
-            if app_instance:
+            if app_instance and app_instance.instance_name in wanted_app_instances:
                 # Add entry 'command name: command function' to the command
                 # dictionary of this app instance.
                 cmd_dict = app_instance_commands.setdefault(
@@ -591,7 +884,7 @@ class GafferEngine(Engine):
 
         # Run the series of app instance commands listed in the
         # 'run_at_startup' setting.
-        for app_setting_dict in self.get_setting("run_at_startup", []):
+        for app_setting_dict in run_at_startup:
             app_instance_name = app_setting_dict["app_instance"]
 
             # Menu name of the command to run or '' to run all commands of the
@@ -611,7 +904,7 @@ class GafferEngine(Engine):
             else:
                 if not setting_cmd_name:
                     # Run all commands of the given app instance.
-                    for (cmd_name, command_function) in list(cmd_dict.items()):
+                    for cmd_name, command_function in cmd_dict.items():
                         msg = (
                             "%s startup running app '%s' command '%s'.",
                             self.name,
@@ -655,6 +948,24 @@ class GafferEngine(Engine):
         self.logger.debug("%s: Destroying...", self)
         self.close_windows()
 
+        # stop reacting to the changes of the script, a new engine might be
+        # operating on it from now on
+        if self._plug_set_connection is not None:
+            self._plug_set_connection.disconnect()
+            self._plug_set_connection = None
+
+        # nor should the scripts added from now on create a menu for it
+        if self._script_added_connection is not None:
+            self._script_added_connection.disconnect()
+            self._script_added_connection = None
+        self._scripts = None
+        self._pending_menu = None
+
+        # make sure no log messages are lost when the application quits, the
+        # messages logged from now on are displayed straight away
+        self._log_buffering = False
+        self._flush_log_buffer()
+
     def _init_pyside(self):
         """
         Checks if we can load PySide2 in this application
@@ -730,7 +1041,7 @@ class GafferEngine(Engine):
             dock_widget.closed.connect(self._remove_dock_widget)
 
             # Remember the dock widget, so we can delete it later.
-            self._dock_widgets.append(dock_widget)
+            self._dock_widgets[id(dock_widget)] = dock_widget
         else:
             # The dock widget wrapper already exists, so just get the
             # shotgun panel from it.
@@ -755,7 +1066,7 @@ class GafferEngine(Engine):
         Removes a docked widget (panel) opened by the engine
         """
         self._get_dialog_parent().removeDockWidget(dock_widget)
-        self._dock_widgets.remove(dock_widget)
+        self._dock_widgets.pop(id(dock_widget), None)
         dock_widget.deleteLater()
 
     @property
@@ -763,8 +1074,7 @@ class GafferEngine(Engine):
         """
         Detect and return if Gaffer is running in batch mode
         """
-        batch_mode = is_batch_mode()
-        return not batch_mode
+        return self._has_ui
 
     def _emit_log_message(self, handler, record):
         """
@@ -778,30 +1088,61 @@ class GafferEngine(Engine):
         :param record: Standard python logging record.
         :type record: :class:`~python.logging.LogRecord`
         """
-        # Give a standard format to the message:
-        #     Shotgun <basename>: <message>
-        # where "basename" is the leaf part of the logging record name,
-        # for example "tk-multi-shotgunpanel" or "qt_importer".
-        if record.levelno < logging.INFO:
-            formatter = logging.Formatter("Debug: Shotgun %(basename)s: %(message)s")
-        else:
-            formatter = logging.Formatter("Shotgun %(basename)s: %(message)s")
+        # Select Gaffer display function and formatter to use according to
+        # the logging record level.
+        for level, fct, formatter in _LOG_LEVEL_DISPATCH:
+            if record.levelno >= level:
+                break
 
         msg = formatter.format(record)
 
-        # Select Gaffer display function to use according to the logging
-        # record level.
-        if record.levelno >= logging.ERROR:
-            fct = display_error
-        elif record.levelno >= logging.WARNING:
-            fct = display_warning
-        elif record.levelno >= logging.INFO:
-            fct = display_info
-        else:
-            fct = display_debug
+        # the engine is not set up yet or is being destroyed, nothing would
+        # flush the buffer
+        if not self._log_buffering:
+            self._flush_log_buffer()
+            fct(msg)
+            return
+
+        # Buffer the message, it will be displayed in Gaffer script editor in
+        # a thread safe manner the next time the buffer is flushed. Only the
+        # first message of a batch schedules the flush, the ones logged until
+        # then join the same batch.
+        with self._log_lock:
+            schedule_flush = not self._log_buffer
+            self._log_buffer.append((fct, msg))
+            self._log_buffer_size += len(msg)
+            flush_now = (
+                record.levelno >= logging.ERROR
+                or len(self._log_buffer) >= LOG_FLUSH_MAX_RECORDS
+                or self._log_buffer_size >= LOG_FLUSH_MAX_BYTES
+            )
+
+        if flush_now:
+            self.async_execute_in_main_thread(self._flush_log_buffer)
+        elif schedule_flush:
+            from sgtk.platform.qt import QtCore
+
+            # the timer is started in the main thread, where its timeout
+            # is executed
+            self.async_execute_in_main_thread(
+                QtCore.QTimer.singleShot, LOG_FLUSH_INTERVAL, self._flush_log_buffer
+            )
+
+    def _flush_log_buffer(self):
+        """
+        Displays all the buffered log messages in Gaffer script editor.
+        Consecutive messages of the same level are joined together so they
+        are written with a single call to the Gaffer log.
+        """
+        with self._log_lock:
+            if not self._log_buffer:
+                return
+            log_buffer = self._log_buffer
+            self._log_buffer = collections.deque()
+            self._log_buffer_size = 0
 
-        # Display the message in Gaffer script editor in a thread safe manner.
-        self.async_execute_in_main_thread(fct, msg)
+        for fct, entries in groupby(log_buffer, key=lambda entry: entry[0]):
+            fct("\n".join(msg for _, msg in entries))
 
     def close_windows(self):
         """
@@ -829,5 +1170,5 @@ class GafferEngine(Engine):
                 )
 
         # Close all dock widgets previously added.
-        for dock_widget in self._dock_widgets[:]:
+        for dock_widget in list(self._dock_widgets.values()):
             dock_widget.close()
@@ -16,11 +16,20 @@ import tempfile
 import uuid
 
 import sgtk
+from sgtk.platform.qt import QtCore, QtGui
 
 import GafferUI
 
 HookClass = sgtk.get_hook_baseclass()
 
+# folder where the thumbnails are written, it does not change while running
+THUMBNAIL_FOLDER = tempfile.gettempdir()
+
+# Shotgun displays thumbnails small, so there is no point in encoding the
+# whole window at its native resolution.
+THUMBNAIL_SIZE = 512
+THUMBNAIL_QUALITY = 75
+
 
 class ThumbnailHook(HookClass):
     """
@@ -47,11 +56,33 @@ class ThumbnailHook(HookClass):
         """
         engine = self.parent.engine
         if engine and engine.script_window:
-            temp_dir = tempfile.gettempdir()
-            temp_filename = "sgtk_thumb_%s.jpg" % uuid.uuid4().hex
-            jpg_thumb_path = os.path.join(temp_dir, temp_filename)
-            GafferUI.WidgetAlgo.grab(engine.script_window, jpg_thumb_path)
+            thumb_id = uuid.uuid4().hex
+            grab_path = os.path.join(THUMBNAIL_FOLDER, "sgtk_grab_%s.bmp" % thumb_id)
+            jpg_thumb_path = os.path.join(
+                THUMBNAIL_FOLDER, "sgtk_thumb_%s.jpg" % thumb_id
+            )
+
+            # let Gaffer grab the window, so the OpenGL viewers and graph
+            # gadgets are captured as they are drawn. It is written
+            # uncompressed, as it is only read back to scale it down before
+            # encoding the thumbnail
+            try:
+                GafferUI.WidgetAlgo.grab(engine.script_window, grab_path)
+                image = QtGui.QImage(grab_path)
+            finally:
+                if os.path.exists(grab_path):
+                    os.remove(grab_path)
 
-            return jpg_thumb_path
+            if max(image.width(), image.height()) > THUMBNAIL_SIZE:
+                image = image.scaled(
+                    THUMBNAIL_SIZE,
+                    THUMBNAIL_SIZE,
+                    QtCore.Qt.KeepAspectRatio,
+                    QtCore.Qt.SmoothTransformation,
+                )
+            if not image.isNull() and image.save(
+                jpg_thumb_path, "JPEG", THUMBNAIL_QUALITY
+            ):
+                return jpg_thumb_path
 
         return None
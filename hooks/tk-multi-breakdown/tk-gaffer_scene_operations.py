@@ -14,6 +14,7 @@ import os
 
 import sgtk
 
+import Gaffer
 import GafferScene
 import GafferImage
 
@@ -23,20 +24,30 @@ __contact__ = "https://www.linkedin.com/in/diegogh/"
 
 HookBaseClass = sgtk.get_hook_baseclass()
 
+# used to only walk the nodes of the node graph, skipping their plugs
+NODE_TYPE_ID = Gaffer.Node.staticTypeId()
+
 
 # let's put some color to these gray-ish UIs
 ITEM_COLORS = {"scene_reader": "#e7a81d", "image_reader": "#a8e71d"}
 
 
-def nodes_of_type(node_type, node=None, result=None):
-    if result is None:
-        result = []
-
-    if isinstance(node, node_type):
-        result.append(node)
-
-    for child in node.children():
-        nodes_of_type(node_type, node=child, result=result)
+def nodes_of_type(node_type, node):
+    """
+    Returns all the nodes of the given type found under the given node,
+    including the node itself, in depth first order.
+    """
+    result = []
+
+    # explicit stack instead of recursion, children are pushed in reverse so
+    # they are visited in the same order as in the script. Only nodes can
+    # contain other nodes, so let Gaffer filter out the plugs for us.
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, node_type):
+            result.append(node)
+        stack.extend(reversed(node.children(NODE_TYPE_ID)))
 
     return result
 
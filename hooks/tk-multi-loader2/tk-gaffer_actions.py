@@ -16,14 +16,13 @@ Hook that loads defines all the available actions, broken down by publish type.
 """
 
 import os
+import stat
 from contextlib import contextmanager
 
 import sgtk
 from sgtk.errors import TankError
 
 import Gaffer
-import GafferScene
-import GafferImage
 
 
 __author__ = "Diego Garcia Huerta"
@@ -35,6 +34,31 @@ HookBaseClass = sgtk.get_hook_baseclass()
 
 class GafferActions(HookBaseClass):
 
+    # icons found in each of the icons folders searched by _get_icon_path, as
+    # dictionaries of icon name to icon path
+    _icons_folders_contents = {}
+
+    # file extensions supported by the reader nodes, see
+    # _get_scene_reader_extensions and _get_image_reader_extensions
+    _scene_reader_extensions = None
+    _image_reader_extensions = None
+
+    # loader actions creating reader nodes, mapped to the name of the node,
+    # the method returning the extensions it supports and the method that
+    # creates it
+    _READER_DISPATCH = {
+        "scene_reader": (
+            "Scene Reader",
+            "_get_scene_reader_extensions",
+            "_create_scene_reader",
+        ),
+        "image_reader": (
+            "Image Reader",
+            "_get_image_reader_extensions",
+            "_create_image_reader",
+        ),
+    }
+
     ###########################################################################
     # public interface - to be overridden by deriving classes
 
@@ -53,17 +77,23 @@ class GafferActions(HookBaseClass):
         # ensure the publisher's icons folder is included in the search
         app_icon_folder = os.path.join(self.disk_location, "icons")
 
-        # build the list of folders to search
-        if icons_folders:
-            icons_folders.append(app_icon_folder)
-        else:
-            icons_folders = [app_icon_folder]
+        # build the list of folders to search, without modifying the given one
+        search_folders = tuple(icons_folders or ()) + (app_icon_folder,)
 
         # keep track of whether we've found the icon path
         found_icon_path = None
 
         # iterate over all the folders to find the icon. first match wins
-        for icons_folder in icons_folders:
+        normcase_icon_name = os.path.normcase(icon_name)
+        for icons_folder in search_folders:
+            found_icon_path = self._get_icons_folder_contents(icons_folder).get(
+                normcase_icon_name
+            )
+            if found_icon_path:
+                break
+
+            # the file system might ignore the case of the names even when
+            # os.path.normcase does not, as on macOS
             icon_path = os.path.join(icons_folder, icon_name)
             if os.path.exists(icon_path):
                 found_icon_path = icon_path
@@ -71,6 +101,29 @@ class GafferActions(HookBaseClass):
 
         return found_icon_path
 
+    def _get_icons_folder_contents(self, icons_folder):
+        """
+        Helper to get the icons available in a folder. The folder is only
+        listed the first time, as the icons do not change while running.
+        :param icons_folder: The folder to look for icons in.
+        :returns: A dictionary of icon file name, normalized with
+            os.path.normcase, to full icon path.
+        """
+        contents = GafferActions._icons_folders_contents.get(icons_folder)
+        if contents is None:
+            try:
+                file_names = os.listdir(icons_folder)
+            except OSError:
+                file_names = []
+
+            contents = dict(
+                (os.path.normcase(file_name), os.path.join(icons_folder, file_name))
+                for file_name in file_names
+            )
+            GafferActions._icons_folders_contents[icons_folder] = contents
+
+        return contents
+
     def generate_actions(self, sg_publish_data, actions, ui_area):
         """
         Returns a list of action instances for a particular publish. This
@@ -211,35 +264,81 @@ class GafferActions(HookBaseClass):
         # complex characters are supported
         path = self.get_publish_path(sg_publish_data).replace(os.path.sep, "/")
 
-        if name == "scene_reader":
-            self._create_scene_reader(path, sg_publish_data)
+        reader_spec = self._READER_DISPATCH.get(name)
+        if reader_spec is None:
+            return
+
+        reader_name, get_extensions, create_reader = reader_spec
 
-        if name == "image_reader":
-            self._create_image_reader(path, sg_publish_data)
+        self._ensure_file_exists(path)
+
+        extensions = getattr(self, get_extensions)()
+        ext = os.path.splitext(path)[1]
+        if ext[1:].lower() not in extensions:
+            raise TankError(
+                "Format file '%s' is not supported by %s node. Supported Formats: %s"
+                % (ext, reader_name, sorted(extensions))
+            )
+
+        getattr(self, create_reader)(path, sg_publish_data)
 
     ###########################################################################
     # helper methods which can be subclassed in custom hooks to fine tune the
     # behaviour of things
 
-    def _create_scene_reader(self, path, sg_publish_data):
+    def _ensure_file_exists(self, path):
         """
-        Creates a scene reader node and loads the publish file iinto it.
+        Raises a TankError if the given path is not an existing file. A
+        single stat call tells both if it exists and if it is a file.
 
         :param path: Path to file.
-        :param sg_publish_data: Shotgun data dictionary with all the standard
-                                publish fields.
         """
-        if not os.path.exists(path):
+        try:
+            is_file = stat.S_ISREG(os.stat(path).st_mode)
+        except OSError:
+            is_file = False
+
+        if not is_file:
             raise TankError("File not found on disk - '%s'" % path)
 
-        scene_reader_extensions = GafferScene.SceneReader.supportedExtensions()
+    @classmethod
+    def _get_scene_reader_extensions(cls):
+        """
+        Returns the lowercase file extensions supported by the Scene Reader
+        node. They are only queried from Gaffer the first time.
+        """
+        if cls._scene_reader_extensions is None:
+            import GafferScene
 
-        _, ext = os.path.splitext(path)
-        if ext[1:].lower() not in scene_reader_extensions:
-            raise TankError(
-                "Format file '%s' is not supported by Scene Reader node. Supported Formats: %s"
-                % (ext, scene_reader_extensions)
+            cls._scene_reader_extensions = frozenset(
+                ext.lower() for ext in GafferScene.SceneReader.supportedExtensions()
+            )
+        return cls._scene_reader_extensions
+
+    @classmethod
+    def _get_image_reader_extensions(cls):
+        """
+        Returns the lowercase file extensions supported by the Image Reader
+        node. They are only queried from Gaffer the first time.
+        """
+        if cls._image_reader_extensions is None:
+            import GafferImage
+
+            cls._image_reader_extensions = frozenset(
+                ext.lower() for ext in GafferImage.ImageReader.supportedExtensions()
             )
+        return cls._image_reader_extensions
+
+    def _create_scene_reader(self, path, sg_publish_data):
+        """
+        Creates a scene reader node and loads the publish file iinto it. The
+        file is expected to exist and be supported, see execute_action.
+
+        :param path: Path to file.
+        :param sg_publish_data: Shotgun data dictionary with all the standard
+                                publish fields.
+        """
+        import GafferScene
 
         reader = GafferScene.SceneReader()
         reader["fileName"].setValue(path)
@@ -254,23 +353,14 @@ class GafferActions(HookBaseClass):
 
     def _create_image_reader(self, path, sg_publish_data):
         """
-        Creates an image reader node and loads the publish file iinto it.
+        Creates an image reader node and loads the publish file iinto it. The
+        file is expected to exist and be supported, see execute_action.
 
         :param path: Path to file.
         :param sg_publish_data: Shotgun data dictionary with all the standard
                                 publish fields.
         """
-        if not os.path.exists(path):
-            raise TankError("File not found on disk - '%s'" % path)
-
-        image_reader_extensions = GafferImage.ImageReader.supportedExtensions()
-
-        _, ext = os.path.splitext(path)
-        if ext[1:].lower() not in image_reader_extensions:
-            raise TankError(
-                "Format file '%s' is not supported by Image Reader node. Supported Formats: %s"
-                % (ext, image_reader_extensions)
-            )
+        import GafferImage
 
         reader = GafferImage.ImageReader()
         reader["fileName"].setValue(path)
@@ -15,8 +15,7 @@ import os
 
 import sgtk
 
-import GafferScene
-import GafferImage
+import Gaffer
 
 __author__ = "Diego Garcia Huerta"
 __contact__ = "https://www.linkedin.com/in/diegogh/"
@@ -24,6 +23,19 @@ __contact__ = "https://www.linkedin.com/in/diegogh/"
 
 HookBaseClass = sgtk.get_hook_baseclass()
 
+# used to only walk the nodes of the node graph, skipping their plugs
+NODE_TYPE_ID = Gaffer.Node.staticTypeId()
+
+# nodes the user can build node graphs in, the only ones looked into when
+# searching for nodes
+CONTAINER_NODE_TYPES = (Gaffer.ScriptNode, Gaffer.SubGraph)
+
+# writer nodes collected for publishing, see _get_writer_specs
+_writer_specs = None
+
+# Gaffer always uses forward slashes in its paths
+NEEDS_SEPARATOR_FIX = os.path.sep != "/"
+
 
 class GafferSessionCollector(HookBaseClass):
     """
@@ -31,6 +43,12 @@ class GafferSessionCollector(HookBaseClass):
     collector hook.
     """
 
+    # icon paths used for the collected items, see _get_icon_path
+    _icon_paths = {}
+
+    # session path of the last collection and its file path components
+    _session_file_info = None
+
     @property
     def settings(self):
         """
@@ -97,12 +115,12 @@ class GafferSessionCollector(HookBaseClass):
 
         publisher = self.parent
 
-        # get the path to the current file
-        path = _session_path()
+        # get the path to the current file, empty if the script is unsaved
+        path = publisher.engine.script["fileName"].getValue()
 
         # determine the display name for the item
         if path:
-            file_info = publisher.util.get_file_path_components(path)
+            file_info = self._get_file_path_components(path)
             display_name = file_info["filename"]
         else:
             display_name = "Current Gaffer Session"
@@ -113,8 +131,7 @@ class GafferSessionCollector(HookBaseClass):
         )
 
         # get the icon path to display for this item
-        icon_path = os.path.join(self.disk_location, os.pardir, "icons", "gaffer.png")
-        session_item.set_icon_from_path(icon_path)
+        session_item.set_icon_from_path(self._get_icon_path("gaffer.png"))
 
         # if a work template is defined, add it to the item properties so
         # that it can be used by attached publish plugins
@@ -140,109 +157,158 @@ class GafferSessionCollector(HookBaseClass):
 
     def collect_gaffer_write_nodes(self, settings, parent_item):
         publisher = self.parent
-        engine = sgtk.platform.current_engine()
-
-        scene_writer_nodes = nodes_of_type(GafferScene.SceneWriter, node=engine.script)
+        engine = publisher.engine
 
-        for node in scene_writer_nodes:
-            writer_path = node["fileName"].getValue()
-            writer_path = writer_path.replace("/", os.path.sep)
+        # these are the same for all the writer items, so only find them once
+        work_template_setting = settings.get("Work Template")
+        work_template = None
+        if work_template_setting:
+            work_template = publisher.engine.get_template_by_name(
+                work_template_setting.value
+            )
 
-            if not writer_path:
-                continue
+        writer_specs = _get_writer_specs()
+        writer_nodes = nodes_by_type(
+            [writer_spec[0] for writer_spec in writer_specs], engine.script
+        )
 
-            display_name = "%s (node)" % node.getName()
+        for writer_spec in writer_specs:
+            (node_type, item_type, type_display, icon_name, publish_type) = writer_spec
+            icon_path = self._get_icon_path(icon_name)
 
-            # create the session item for the publish hierarchy
-            writer_item = parent_item.create_item(
-                "gaffer.SceneCache", "SceneCache", display_name
-            )
+            for node in writer_nodes[node_type]:
+                writer_path = _to_native_separators(node["fileName"].getValue())
 
-            # get the icon path to display for this item
-            icon_path = os.path.join(
-                self.disk_location, os.pardir, "icons", "geometry.png"
-            )
-            writer_item.set_icon_from_path(icon_path)
+                if not writer_path:
+                    continue
 
-            # if a work template is defined, add it to the item properties so
-            # that it can be used by attached publish plugins
-            work_template_setting = settings.get("Work Template")
-            if work_template_setting:
+                display_name = "%s (node)" % node.getName()
 
-                work_template = publisher.engine.get_template_by_name(
-                    work_template_setting.value
+                # create the writer item for the publish hierarchy
+                writer_item = parent_item.create_item(
+                    item_type, type_display, display_name
                 )
 
-                # store the template on the item for use by publish plugins. we
-                # can't evaluate the fields here because there's no guarantee the
-                # current session path won't change once the item has been created.
-                # the attached publish plugins will need to resolve the fields at
-                # execution time.
-                writer_item.properties["work_template"] = work_template
-                writer_item.properties["publish_type"] = "SceneCache"
-                writer_item.properties["node"] = node
-                writer_item.properties["writer_path"] = writer_path
-
-        image_writer_nodes = nodes_of_type(GafferImage.ImageWriter, node=engine.script)
+                # set the icon to display for this item
+                writer_item.set_icon_from_path(icon_path)
 
-        for node in image_writer_nodes:
-            writer_path = node["fileName"].getValue()
-            writer_path = writer_path.replace("/", os.path.sep)
+                # if a work template is defined, add it to the item properties
+                # so that it can be used by attached publish plugins
+                if work_template_setting:
 
-            if not writer_path:
-                continue
+                    # store the template on the item for use by publish plugins.
+                    # we can't evaluate the fields here because there's no
+                    # guarantee the current session path won't change once the
+                    # item has been created. the attached publish plugins will
+                    # need to resolve the fields at execution time.
+                    writer_item.properties["work_template"] = work_template
+                    writer_item.properties["publish_type"] = publish_type
+                    writer_item.properties["node"] = node
+                    writer_item.properties["writer_path"] = writer_path
 
-            display_name = "%s (node)" % node.getName()
+    def _get_file_path_components(self, path):
+        """
+        Returns the file path components of the given path, reusing the ones
+        of the previous collection if the session path did not change.
 
-            # create the session item for the publish hierarchy
-            writer_item = parent_item.create_item(
-                "gaffer.ImageWriter", "ImageWriter", display_name
-            )
+        :param path: The path to the current session
+        """
+        if self._session_file_info is None or self._session_file_info[0] != path:
+            file_info = self.parent.util.get_file_path_components(path)
+            self._session_file_info = (path, file_info)
+        return self._session_file_info[1]
 
-            # get the icon path to display for this item
-            icon_path = os.path.join(
-                self.disk_location, os.pardir, "icons", "texture.png"
-            )
-            writer_item.set_icon_from_path(icon_path)
+    def _get_icon_path(self, icon_name):
+        """
+        Returns the path to the given icon in the publisher icons folder.
 
-            # if a work template is defined, add it to the item properties so
-            # that it can be used by attached publish plugins
-            work_template_setting = settings.get("Work Template")
-            if work_template_setting:
+        The very same path is returned for all the items using the icon, as
+        it is only built the first time, so Qt can reuse the icon it already
+        loaded from disk instead of decoding it again for every item.
 
-                work_template = publisher.engine.get_template_by_name(
-                    work_template_setting.value
-                )
+        :param icon_name: The file name of the icon. ex: "gaffer.png"
+        """
+        cache_key = (self.disk_location, icon_name)
+        icon_path = GafferSessionCollector._icon_paths.get(cache_key)
+        if icon_path is None:
+            icon_path = os.path.join(self.disk_location, os.pardir, "icons", icon_name)
+            GafferSessionCollector._icon_paths[cache_key] = icon_path
+        return icon_path
 
-                # store the template on the item for use by publish plugins. we
-                # can't evaluate the fields here because there's no guarantee the
-                # current session path won't change once the item has been created.
-                # the attached publish plugins will need to resolve the fields at
-                # execution time.
-                writer_item.properties["work_template"] = work_template
-                writer_item.properties["publish_type"] = "Image"
-                writer_item.properties["node"] = node
-                writer_item.properties["writer_path"] = writer_path
 
+def nodes_by_type(node_types, node):
+    """
+    Finds the given node and all its descendants of any of the given types
+    walking the node graph only once.
 
-def nodes_of_type(node_type, node=None, result=None):
-    if result is None:
-        result = []
+    Only the given node and the containers the user can build node graphs
+    in (see CONTAINER_NODE_TYPES) are descended into, the internal nodes of
+    any other node are an implementation detail of that node.
 
-    if isinstance(node, node_type):
-        result.append(node)
+    :returns: dictionary mapping each node type to the list of nodes of that
+        type, in depth first order.
+    """
+    nodes = dict((node_type, []) for node_type in node_types)
+    node_types = tuple(node_types)
+
+    # explicit stack instead of recursion, children are pushed in reverse so
+    # they are visited in the same order as in the script. Only nodes can
+    # contain other nodes, so let Gaffer filter out the plugs for us.
+    root = node
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, node_types):
+            for node_type in node_types:
+                if isinstance(node, node_type):
+                    nodes[node_type].append(node)
+                    break
+            continue
+
+        if node is root or isinstance(node, CONTAINER_NODE_TYPES):
+            stack.extend(reversed(node.children(NODE_TYPE_ID)))
+
+    return nodes
+
+
+def _get_writer_specs():
+    """
+    Return the writer nodes collected for publishing, as tuples of node type,
+    publish item type, item type display name, icon and publish type.
 
-    for child in node.children():
-        nodes_of_type(node_type, node=child, result=result)
+    The Gaffer scene and image modules are only imported the first time
+    writers are collected.
+    """
+    global _writer_specs
+
+    if _writer_specs is None:
+        import GafferScene
+        import GafferImage
+
+        _writer_specs = (
+            (
+                GafferScene.SceneWriter,
+                "gaffer.SceneCache",
+                "SceneCache",
+                "geometry.png",
+                "SceneCache",
+            ),
+            (
+                GafferImage.ImageWriter,
+                "gaffer.ImageWriter",
+                "ImageWriter",
+                "texture.png",
+                "Image",
+            ),
+        )
 
-    return result
+    return _writer_specs
 
 
-def _session_path():
+def _to_native_separators(path):
     """
-    Return the path to the current session
-    :return:
+    Return the Gaffer path using the separators of the current OS
     """
-    engine = sgtk.platform.current_engine()
-    current_script_filename = engine.script["fileName"].getValue()
-    return current_script_filename
+    if NEEDS_SEPARATOR_FIX:
+        return path.replace("/", os.path.sep)
+    return path
@@ -14,13 +14,11 @@ import os
 import itertools
 
 import sgtk
-from sgtk.util.filesystem import ensure_folder_exists
 
 
-import GafferUI
+import Gaffer
 import GafferScene
 import GafferImage
-from GafferUI.FileMenu import __pathAndBookmarks
 
 
 __author__ = "Diego Garcia Huerta"
@@ -29,6 +27,9 @@ __contact__ = "https://www.linkedin.com/in/diegogh/"
 
 HookBaseClass = sgtk.get_hook_baseclass()
 
+# used to only walk the nodes of the node graph, skipping their plugs
+NODE_TYPE_ID = Gaffer.Node.staticTypeId()
+
 
 class GafferImageWriterPublishPlugin(HookBaseClass):
     """
@@ -42,6 +43,13 @@ class GafferImageWriterPublishPlugin(HookBaseClass):
 
     """
 
+    @property
+    def _tk_gaffer(self):
+        """
+        Session helpers shared by all the hooks of this engine
+        """
+        return self.parent.engine.import_module("tk_gaffer")
+
     # NOTE: The plugin icon and name are defined by the base file plugin.
 
     @property
@@ -183,14 +191,15 @@ class GafferImageWriterPublishPlugin(HookBaseClass):
         if settings.get("Publish Template").value:
             item.context_change_allowed = False
 
-        path = _session_path()
+        path = self._tk_gaffer.session_path()
 
         if not path:
             # the ImageWriter has not been saved before (no path determined).
             # provide a save button. the ImageWriter will need to be saved before
             # validation will succeed.
             self.logger.warn(
-                "The Gaffer Session has not been saved.", extra=_get_save_as_action()
+                "The Gaffer Session has not been saved.",
+                extra=self._tk_gaffer.get_save_as_action(),
             )
 
         self.logger.info(
@@ -211,7 +220,7 @@ class GafferImageWriterPublishPlugin(HookBaseClass):
         """
 
         publisher = self.parent
-        path = _session_path()
+        path = self._tk_gaffer.session_path()
 
         # ---- ensure the ImageWriter has been saved
 
@@ -219,7 +228,7 @@ class GafferImageWriterPublishPlugin(HookBaseClass):
             # the ImageWriter still requires saving. provide a save button.
             # validation fails.
             error_msg = "The Gaffer Session has not been saved."
-            self.logger.error(error_msg, extra=_get_save_as_action())
+            self.logger.error(error_msg, extra=self._tk_gaffer.get_save_as_action())
             raise Exception(error_msg)
 
         # ---- check the ImageWriter against any attached work template
@@ -244,7 +253,7 @@ class GafferImageWriterPublishPlugin(HookBaseClass):
                             "tooltip": "Save the current Gaffer Session to a "
                             "different file name",
                             # will launch wf2 if configured
-                            "callback": _get_save_as_action(),
+                            "callback": self._tk_gaffer.get_save_as_action(),
                         }
                     },
                 )
@@ -348,7 +357,7 @@ class GafferImageWriterPublishPlugin(HookBaseClass):
 
         # get the path in a normalized state. no trailing separator, separators
         # are appropriate for current os, no double separators, etc.
-        path = sgtk.util.ShotgunPath.normalize(_session_path())
+        path = sgtk.util.ShotgunPath.normalize(self._tk_gaffer.session_path())
 
         # update the item with the saved ImageWriter path
         item.properties["path"] = path
@@ -362,15 +371,22 @@ class GafferImageWriterPublishPlugin(HookBaseClass):
         super(GafferImageWriterPublishPlugin, self).publish(settings, item)
 
 
-def nodes_of_type(node_type, node=None, result=None):
-    if result is None:
-        result = []
-
-    if isinstance(node, node_type):
-        result.append(node)
-
-    for child in node.children():
-        nodes_of_type(node_type, node=child, result=result)
+def nodes_of_type(node_type, node):
+    """
+    Returns all the nodes of the given type found under the given node,
+    including the node itself, in depth first order.
+    """
+    result = []
+
+    # explicit stack instead of recursion, children are pushed in reverse so
+    # they are visited in the same order as in the script. Only nodes can
+    # contain other nodes, so let Gaffer filter out the plugs for us.
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, node_type):
+            result.append(node)
+        stack.extend(reversed(node.children(NODE_TYPE_ID)))
 
     return result
 
@@ -383,81 +399,3 @@ def _gaffer_find_additional_image_writer_dependencies():
     # them as dependencies
 
     return []
-
-
-def _session_path():
-    """
-    Return the path to the current session
-    :return:
-    """
-    engine = sgtk.platform.current_engine()
-    current_script_filename = engine.script["fileName"].getValue()
-    return current_script_filename
-
-
-def _save_session(path):
-    """
-    Save the current session to the supplied path.
-    """
-
-    # Ensure that the folder is created when saving
-    folder = os.path.dirname(path)
-    ensure_folder_exists(folder)
-
-    engine = sgtk.platform.current_engine()
-    script = engine.script
-
-    script["fileName"].setValue(path)
-    with GafferUI.ErrorDialogue.ErrorHandler(
-        title="Error Saving File", parentWindow=engine.script_window
-    ):
-        script.serialiseToFile(path)
-
-
-# TODO: method duplicated in all the gaffer hooks
-def _get_save_as_action():
-    """
-    Simple helper for returning a log action dict for saving the session
-    """
-
-    engine = sgtk.platform.current_engine()
-
-    callback = _save_as
-
-    # if workfiles2 is configured, use that for file save
-    if "tk-multi-workfiles2" in engine.apps:
-        app = engine.apps["tk-multi-workfiles2"]
-        if hasattr(app, "show_file_save_dlg"):
-            callback = app.show_file_save_dlg
-
-    return {
-        "action_button": {
-            "label": "Save As...",
-            "tooltip": "Save the current session",
-            "callback": callback,
-        }
-    }
-
-
-def _save_as():
-    engine = sgtk.platform.current_engine()
-
-    path, bookmarks = __pathAndBookmarks(engine.script_window)
-
-    dialogue = GafferUI.PathChooserDialogue(
-        path, title="Save script", confirmLabel="Save", leaf=True, bookmarks=bookmarks
-    )
-    path = dialogue.waitForPath(parentWindow=engine.script_window)
-
-    if not path:
-        return
-
-    path = str(path)
-    if not path.endswith(".gfr"):
-        path += ".gfr"
-
-    engine.script["fileName"].setValue(path)
-    with GafferUI.ErrorDialogue.ErrorHandler(
-        title="Error Saving File", parentWindow=engine.script_windowWindow
-    ):
-        engine.script.save()
@@ -11,16 +11,13 @@
 # ----------------------------------------------------------------------------
 
 import os
-import itertools
 
 import sgtk
-from sgtk.util.filesystem import ensure_folder_exists
 
 
-import GafferUI
+import Gaffer
 import GafferScene
 import GafferImage
-from GafferUI.FileMenu import __pathAndBookmarks
 
 
 __author__ = "Diego Garcia Huerta"
@@ -29,6 +26,9 @@ __contact__ = "https://www.linkedin.com/in/diegogh/"
 
 HookBaseClass = sgtk.get_hook_baseclass()
 
+# used to only walk the nodes of the node graph, skipping their plugs
+NODE_TYPE_ID = Gaffer.Node.staticTypeId()
+
 
 class GafferSessionPublishPlugin(HookBaseClass):
     """
@@ -42,6 +42,13 @@ class GafferSessionPublishPlugin(HookBaseClass):
 
     """
 
+    @property
+    def _tk_gaffer(self):
+        """
+        Session helpers shared by all the hooks of this engine
+        """
+        return self.parent.engine.import_module("tk_gaffer")
+
     # NOTE: The plugin icon and name are defined by the base file plugin.
 
     @property
@@ -183,14 +190,15 @@ class GafferSessionPublishPlugin(HookBaseClass):
         if settings.get("Publish Template").value:
             item.context_change_allowed = False
 
-        path = _session_path()
+        path = self._tk_gaffer.session_path()
 
         if not path:
             # the session has not been saved before (no path determined).
             # provide a save button. the session will need to be saved before
             # validation will succeed.
             self.logger.warn(
-                "The Gaffer session has not been saved.", extra=_get_save_as_action()
+                "The Gaffer session has not been saved.",
+                extra=self._tk_gaffer.get_save_as_action(),
             )
 
         self.logger.info(
@@ -211,7 +219,7 @@ class GafferSessionPublishPlugin(HookBaseClass):
         """
 
         publisher = self.parent
-        path = _session_path()
+        path = self._tk_gaffer.session_path()
 
         # ---- ensure the session has been saved
 
@@ -219,7 +227,7 @@ class GafferSessionPublishPlugin(HookBaseClass):
             # the session still requires saving. provide a save button.
             # validation fails.
             error_msg = "The Gaffer session has not been saved."
-            self.logger.error(error_msg, extra=_get_save_as_action())
+            self.logger.error(error_msg, extra=self._tk_gaffer.get_save_as_action())
             raise Exception(error_msg)
 
         # ---- check the session against any attached work template
@@ -244,7 +252,7 @@ class GafferSessionPublishPlugin(HookBaseClass):
                             "tooltip": "Save the current Gaffer session to a "
                             "different file name",
                             # will launch wf2 if configured
-                            "callback": _get_save_as_action(),
+                            "callback": self._tk_gaffer.get_save_as_action(),
                         }
                     },
                 )
@@ -262,11 +270,14 @@ class GafferSessionPublishPlugin(HookBaseClass):
         if next_version_path and os.path.exists(next_version_path):
 
             # determine the next available version_number. just keep asking for
-            # the next one until we get one that doesn't exist.
-            while os.path.exists(next_version_path):
+            # the next one until we get one that doesn't exist. The first one
+            # is already known to exist.
+            while True:
                 (next_version_path, version) = self._get_next_version_info(
                     next_version_path, item
                 )
+                if not os.path.exists(next_version_path):
+                    break
 
             error_msg = "The next version of this file already exists on disk."
             self.logger.error(
@@ -276,7 +287,9 @@ class GafferSessionPublishPlugin(HookBaseClass):
                         "label": "Save to v%s" % (version,),
                         "tooltip": "Save to the next available version number, "
                         "v%s" % (version,),
-                        "callback": lambda: _save_session(next_version_path),
+                        "callback": lambda: self._tk_gaffer.save_session(
+                            next_version_path
+                        ),
                     }
                 },
             )
@@ -311,10 +324,10 @@ class GafferSessionPublishPlugin(HookBaseClass):
 
         # get the path in a normalized state. no trailing separator, separators
         # are appropriate for current os, no double separators, etc.
-        path = sgtk.util.ShotgunPath.normalize(_session_path())
+        path = sgtk.util.ShotgunPath.normalize(self._tk_gaffer.session_path())
 
         # ensure the session is saved
-        _save_session(path)
+        self._tk_gaffer.save_session(path)
 
         # update the item with the saved session path
         item.properties["path"] = path
@@ -342,18 +355,27 @@ class GafferSessionPublishPlugin(HookBaseClass):
         super(GafferSessionPublishPlugin, self).finalize(settings, item)
 
         # bump the session file to the next version
-        self._save_to_next_version(item.properties["path"], item, _save_session)
-
-
-def nodes_of_type(node_type, node=None, result=None):
-    if result is None:
-        result = []
+        self._save_to_next_version(
+            item.properties["path"], item, self._tk_gaffer.save_session
+        )
 
-    if isinstance(node, node_type):
-        result.append(node)
 
-    for child in node.children():
-        nodes_of_type(node_type, node=child, result=result)
+def nodes_of_type(node_type, node):
+    """
+    Returns all the nodes of the given type, or tuple of types, found under
+    the given node, including the node itself, in depth first order.
+    """
+    result = []
+
+    # explicit stack instead of recursion, children are pushed in reverse so
+    # they are visited in the same order as in the script. Only nodes can
+    # contain other nodes, so let Gaffer filter out the plugs for us.
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, node_type):
+            result.append(node)
+        stack.extend(reversed(node.children(NODE_TYPE_ID)))
 
     return result
 
@@ -369,90 +391,14 @@ def _gaffer_find_additional_session_dependencies():
 
     engine = sgtk.platform.current_engine()
 
-    scene_reader_nodes = nodes_of_type(GafferScene.SceneReader, node=engine.script)
-    image_reader_nodes = nodes_of_type(GafferImage.ImageReader, node=engine.script)
+    # collect both kinds of readers in a single walk of the node graph
+    reader_nodes = nodes_of_type(
+        (GafferScene.SceneReader, GafferImage.ImageReader), node=engine.script
+    )
 
-    for node in itertools.chain(scene_reader_nodes, image_reader_nodes):
+    for node in reader_nodes:
         ref_path = node["fileName"].getValue()
         ref_path = ref_path.replace("/", os.path.sep)
         ref_paths.add(ref_path)
 
     return list(ref_paths)
-
-
-def _session_path():
-    """
-    Return the path to the current session
-    :return:
-    """
-    engine = sgtk.platform.current_engine()
-    current_script_filename = engine.script["fileName"].getValue()
-    return current_script_filename
-
-
-def _save_session(path):
-    """
-    Save the current session to the supplied path.
-    """
-
-    # Ensure that the folder is created when saving
-    folder = os.path.dirname(path)
-    ensure_folder_exists(folder)
-
-    engine = sgtk.platform.current_engine()
-    script = engine.script
-
-    script["fileName"].setValue(path)
-    with GafferUI.ErrorDialogue.ErrorHandler(
-        title="Error Saving File", parentWindow=engine.script_window
-    ):
-        script.serialiseToFile(path)
-
-
-# TODO: method duplicated in all the gaffer hooks
-def _get_save_as_action():
-    """
-    Simple helper for returning a log action dict for saving the session
-    """
-
-    engine = sgtk.platform.current_engine()
-
-    callback = _save_as
-
-    # if workfiles2 is configured, use that for file save
-    if "tk-multi-workfiles2" in engine.apps:
-        app = engine.apps["tk-multi-workfiles2"]
-        if hasattr(app, "show_file_save_dlg"):
-            callback = app.show_file_save_dlg
-
-    return {
-        "action_button": {
-            "label": "Save As...",
-            "tooltip": "Save the current session",
-            "callback": callback,
-        }
-    }
-
-
-def _save_as():
-    engine = sgtk.platform.current_engine()
-
-    path, bookmarks = __pathAndBookmarks(engine.script_window)
-
-    dialogue = GafferUI.PathChooserDialogue(
-        path, title="Save script", confirmLabel="Save", leaf=True, bookmarks=bookmarks
-    )
-    path = dialogue.waitForPath(parentWindow=engine.script_window)
-
-    if not path:
-        return
-
-    path = str(path)
-    if not path.endswith(".gfr"):
-        path += ".gfr"
-
-    engine.script["fileName"].setValue(path)
-    with GafferUI.ErrorDialogue.ErrorHandler(
-        title="Error Saving File", parentWindow=engine.script_windowWindow
-    ):
-        engine.script.save()
@@ -13,10 +13,6 @@
 import os
 
 import sgtk
-from sgtk.util.filesystem import ensure_folder_exists
-
-import GafferUI
-from GafferUI.FileMenu import __pathAndBookmarks
 
 
 __author__ = "Diego Garcia Huerta"
@@ -32,6 +28,13 @@ class GafferStartVersionControlPlugin(HookBaseClass):
     does not exist.
     """
 
+    @property
+    def _tk_gaffer(self):
+        """
+        Session helpers shared by all the hooks of this engine
+        """
+        return self.parent.engine.import_module("tk_gaffer")
+
     @property
     def icon(self):
         """
@@ -128,7 +131,7 @@ class GafferStartVersionControlPlugin(HookBaseClass):
         :returns: dictionary with boolean keys accepted, required and enabled
         """
 
-        path = _session_path()
+        path = self._tk_gaffer.session_path()
 
         if path:
             version_number = self._get_version_number(path, item)
@@ -144,7 +147,8 @@ class GafferStartVersionControlPlugin(HookBaseClass):
             # provide a save button. the session will need to be saved before
             # validation will succeed.
             self.logger.warn(
-                "The Gaffer session has not been saved.", extra=_get_save_as_action()
+                "The Gaffer session has not been saved.",
+                extra=self._tk_gaffer.get_save_as_action(),
             )
 
         self.logger.info(
@@ -171,13 +175,13 @@ class GafferStartVersionControlPlugin(HookBaseClass):
         """
 
         publisher = self.parent
-        path = _session_path()
+        path = self._tk_gaffer.session_path()
 
         if not path:
             # the session still requires saving. provide a save button.
             # validation fails
             error_msg = "The Gaffer session has not been saved."
-            self.logger.error(error_msg, extra=_get_save_as_action())
+            self.logger.error(error_msg, extra=self._tk_gaffer.get_save_as_action())
             raise Exception(error_msg)
 
         # NOTE: If the plugin is attached to an item, that means no version
@@ -193,7 +197,7 @@ class GafferStartVersionControlPlugin(HookBaseClass):
                 "A file already exists with a version number. Please "
                 "choose another name."
             )
-            self.logger.error(error_msg, extra=_get_save_as_action())
+            self.logger.error(error_msg, extra=self._tk_gaffer.get_save_as_action())
             raise Exception(error_msg)
 
         return True
@@ -212,16 +216,16 @@ class GafferStartVersionControlPlugin(HookBaseClass):
 
         # get the path in a normalized state. no trailing separator, separators
         # are appropriate for current os, no double separators, etc.
-        path = sgtk.util.ShotgunPath.normalize(_session_path())
+        path = sgtk.util.ShotgunPath.normalize(self._tk_gaffer.session_path())
 
         # ensure the session is saved in its current state
-        _save_session(path)
+        self._tk_gaffer.save_session(path)
 
         # get the path to a versioned copy of the file.
         version_path = publisher.util.get_version_path(path, "v001")
 
         # save to the new version path
-        _save_session(version_path)
+        self._tk_gaffer.save_session(version_path)
         self.logger.info("A version number has been added to the Gaffer file...")
         self.logger.info("  Gaffer file path: %s" % (version_path,))
 
@@ -275,84 +279,6 @@ class GafferStartVersionControlPlugin(HookBaseClass):
         return version_number
 
 
-def _session_path():
-    """
-    Return the path to the current session
-    :return:
-    """
-    engine = sgtk.platform.current_engine()
-    current_script_filename = engine.script["fileName"].getValue()
-    return current_script_filename
-
-
-def _save_session(path):
-    """
-    Save the current session to the supplied path.
-    """
-
-    # Ensure that the folder is created when saving
-    folder = os.path.dirname(path)
-    ensure_folder_exists(folder)
-
-    engine = sgtk.platform.current_engine()
-    script = engine.script
-
-    script["fileName"].setValue(path)
-    with GafferUI.ErrorDialogue.ErrorHandler(
-        title="Error Saving File", parentWindow=engine.script_window
-    ):
-        script.serialiseToFile(path)
-
-
-# TODO: method duplicated in all the gaffer hooks
-def _get_save_as_action():
-    """
-    Simple helper for returning a log action dict for saving the session
-    """
-
-    engine = sgtk.platform.current_engine()
-
-    callback = _save_as
-
-    # if workfiles2 is configured, use that for file save
-    if "tk-multi-workfiles2" in engine.apps:
-        app = engine.apps["tk-multi-workfiles2"]
-        if hasattr(app, "show_file_save_dlg"):
-            callback = app.show_file_save_dlg
-
-    return {
-        "action_button": {
-            "label": "Save As...",
-            "tooltip": "Save the current session",
-            "callback": callback,
-        }
-    }
-
-
-def _save_as():
-    engine = sgtk.platform.current_engine()
-
-    path, bookmarks = __pathAndBookmarks(engine.script_window)
-
-    dialogue = GafferUI.PathChooserDialogue(
-        path, title="Save script", confirmLabel="Save", leaf=True, bookmarks=bookmarks
-    )
-    path = dialogue.waitForPath(parentWindow=engine.script_window)
-
-    if not path:
-        return
-
-    path = str(path)
-    if not path.endswith(".gfr"):
-        path += ".gfr"
-
-    engine.script["fileName"].setValue(path)
-    with GafferUI.ErrorDialogue.ErrorHandler(
-        title="Error Saving File", parentWindow=engine.script_windowWindow
-    ):
-        engine.script.save()
-
-
 def _get_version_docs_action():
     """
     Simple helper for returning a log action to show version docs
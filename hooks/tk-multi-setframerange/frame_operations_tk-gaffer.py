@@ -36,11 +36,14 @@ class FrameOperation(HookBaseClass):
         :returns: Returns the frame range in the form (in_frame, out_frame)
         :rtype: tuple[int, int]
         """
-        engine = sgtk.platform.current_engine()
+        script = self.parent.engine.script
 
-        current_in = engine.script["frameRange"]["start"].getValue() if engine else 1
-        current_out = engine.script["frameRange"]["end"].getValue() if engine else 100
-        return (current_in, current_out)
+        # there is no frame range to read until a script is open
+        if not script:
+            return (1, 100)
+
+        frame_range = script["frameRange"]
+        return (frame_range["start"].getValue(), frame_range["end"].getValue())
 
     def set_frame_range(self, in_frame=None, out_frame=None, **kwargs):
         """
@@ -50,10 +53,11 @@ class FrameOperation(HookBaseClass):
         :param int out_frame: out_frame for the current context
             (e.g. the current shot, current asset etc)
         """
-        engine = sgtk.platform.current_engine()
+        script = self.parent.engine.script
 
-        if engine.script:
-            engine.script["frameRange"]["start"].setValue(in_frame)
-            engine.script["frameRange"]["end"].setValue(out_frame)
-            playback_slider = GafferUI.Playback.acquire(engine.script.context())
+        if script:
+            frame_range = script["frameRange"]
+            frame_range["start"].setValue(in_frame)
+            frame_range["end"].setValue(out_frame)
+            playback_slider = GafferUI.Playback.acquire(script.context())
             playback_slider.setFrameRange(in_frame, out_frame)
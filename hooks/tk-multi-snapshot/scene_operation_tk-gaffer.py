@@ -51,23 +51,23 @@ class SceneOperation(HookClass):
                                      file path as a String
                     all others     - None
         """
-        engine = sgtk.platform.current_engine()
+        engine = self.parent.engine
+        script = engine.script
 
         if operation == "current_path":
-            current_script_filename = engine.script["fileName"].getValue()
+            current_script_filename = script["fileName"].getValue()
             return current_script_filename
 
         elif operation == "open":
             # this is a trick to make gaffer reuse the same script window
             # as we are really loading the same script but a previous
             # snapshot in time
-            engine.script["fileName"].setValue("")
-            engine.script["unsavedChanges"].setValue(False)
+            script["fileName"].setValue("")
+            script["unsavedChanges"].setValue(False)
 
-            open_script(engine.script, file_path)
+            open_script(script, file_path)
 
         elif operation == "save":
-            script = engine.script
             if script["fileName"].getValue():
                 with GafferUI.ErrorDialogue.ErrorHandler(
                     title="Error Saving File", parentWindow=engine.script_window
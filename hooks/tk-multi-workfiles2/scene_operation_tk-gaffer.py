@@ -79,7 +79,8 @@ class SceneOperation(HookClass):
                                 all others     - None
         """
         app = self.parent
-        engine = sgtk.platform.current_engine()
+        engine = app.engine
+        script = engine.script
 
         app.log_debug("-" * 50)
         app.log_debug("operation: %s" % operation)
@@ -90,14 +91,13 @@ class SceneOperation(HookClass):
         app.log_debug("read_only: %s" % read_only)
 
         if operation == "current_path":
-            current_script_filename = engine.script["fileName"].getValue()
+            current_script_filename = script["fileName"].getValue()
             return current_script_filename
 
         elif operation == "open":
-            open_script(engine.script, file_path)
+            open_script(script, file_path)
 
         elif operation == "save":
-            script = engine.script
             if script["fileName"].getValue():
                 with GafferUI.ErrorDialogue.ErrorHandler(
                     title="Error Saving File", parentWindow=engine.script_window
@@ -105,8 +105,6 @@ class SceneOperation(HookClass):
                     script.save()
 
         elif operation == "save_as":
-            script = engine.script
-
             script["fileName"].setValue(file_path)
             with GafferUI.ErrorDialogue.ErrorHandler(
                 title="Error Saving File", parentWindow=engine.script_window
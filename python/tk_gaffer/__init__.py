@@ -12,3 +12,4 @@
 
 
 from .menu_generation import MenuGenerator, can_create_menu
+from .hook_utils import session_path, save_session, get_save_as_action, save_as
@@ -0,0 +1,108 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2021, Diego Garcia Huerta.
+#
+# Your use of this software as distributed in this GitHub repository, is
+# governed by the MIT License
+#
+# Your use of the Shotgun Pipeline Toolkit is governed by the applicable
+# license agreement between you and Autodesk / Shotgun.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+
+"""
+Session helpers shared by the hooks of this engine
+
+"""
+
+import os
+
+import tank
+from tank.util.filesystem import ensure_folder_exists
+
+__author__ = "Diego Garcia Huerta"
+__contact__ = "https://www.linkedin.com/in/diegogh/"
+
+
+def session_path():
+    """
+    Return the path to the current session
+    :return:
+    """
+    engine = tank.platform.current_engine()
+    current_script_filename = engine.script["fileName"].getValue()
+    return current_script_filename
+
+
+def save_session(path):
+    """
+    Save the current session to the supplied path.
+    """
+    import GafferUI
+
+    # Ensure that the folder is created when saving
+    folder = os.path.dirname(path)
+    ensure_folder_exists(folder)
+
+    engine = tank.platform.current_engine()
+    script = engine.script
+
+    script["fileName"].setValue(path)
+    with GafferUI.ErrorDialogue.ErrorHandler(
+        title="Error Saving File", parentWindow=engine.script_window
+    ):
+        script.serialiseToFile(path)
+
+
+def get_save_as_action():
+    """
+    Simple helper for returning a log action dict for saving the session
+    """
+
+    engine = tank.platform.current_engine()
+
+    callback = save_as
+
+    # if workfiles2 is configured, use that for file save
+    app = engine.apps.get("tk-multi-workfiles2")
+    if app and hasattr(app, "show_file_save_dlg"):
+        callback = app.show_file_save_dlg
+
+    return {
+        "action_button": {
+            "label": "Save As...",
+            "tooltip": "Save the current session",
+            "callback": callback,
+        }
+    }
+
+
+def save_as():
+    """
+    Prompts the user for a path and saves the current session to it.
+    """
+    import GafferUI
+    from GafferUI.FileMenu import __pathAndBookmarks
+
+    engine = tank.platform.current_engine()
+
+    path, bookmarks = __pathAndBookmarks(engine.script_window)
+
+    dialogue = GafferUI.PathChooserDialogue(
+        path, title="Save script", confirmLabel="Save", leaf=True, bookmarks=bookmarks
+    )
+    path = dialogue.waitForPath(parentWindow=engine.script_window)
+
+    if not path:
+        return
+
+    path = str(path)
+    if not path.endswith(".gfr"):
+        path += ".gfr"
+
+    engine.script["fileName"].setValue(path)
+    with GafferUI.ErrorDialogue.ErrorHandler(
+        title="Error Saving File", parentWindow=engine.script_window
+    ):
+        engine.script.save()
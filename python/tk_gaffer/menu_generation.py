@@ -17,9 +17,12 @@ Menu handling for this engine
 """
 
 import os
+import functools
+import logging
 import subprocess
 import sys
 import unicodedata
+import weakref
 
 import tank
 from tank.platform.qt import QtCore, QtGui
@@ -28,16 +31,37 @@ from tank.util import is_linux, is_macos, is_windows
 __author__ = "Diego Garcia Huerta"
 __contact__ = "https://www.linkedin.com/in/diegogh/"
 
-import IECore
-import GafferUI
+
+# menu bar of the window of each script, see get_menubar
+_menubars = weakref.WeakKeyDictionary()
+
+
+def _is_alive(qt_object):
+    """
+    Whether the C++ object wrapped by the given Qt object still exists, it
+    goes away with its window while the Python wrapper might live on.
+    """
+    try:
+        qt_object.objectName()
+    except RuntimeError:
+        return False
+    return True
 
 
 def get_menubar(script):
     """
-    Retrieves the Menu bar of the QApplication
+    Retrieves the Menu bar of the QApplication. It is only looked up again
+    for a script if its window, and so its menu bar, has been deleted.
     """
-    win = GafferUI.ScriptWindow.acquire(script)
-    return win.menuBar()._qtWidget()
+    menubar = _menubars.get(script)
+    if menubar is None or not _is_alive(menubar):
+        import GafferUI
+
+        win = GafferUI.ScriptWindow.acquire(script)
+        menubar = win.menuBar()._qtWidget()
+        if menubar is not None:
+            _menubars[script] = menubar
+    return menubar
 
 
 def can_create_menu(script):
@@ -48,46 +72,55 @@ def can_create_menu(script):
     return script and get_menubar(script) is not None
 
 
-# borrowed from tk-maya, needed to remove the args from the QAction callbacks
-class Callback(object):
-    def __init__(self, callback):
-        self.callback = callback
+# borrowed from tk-maya, needed to remove the args from the QAction callbacks.
+# Menu commands are partials of this function, cheaper to build than an object
+# for each menu item every time the menu is rebuilt.
+def _execute_deferred(callback, *_):
+    """
+    Execute the callback deferred to avoid potential problems with the
+    command resulting in the menu being deleted, e.g. if the context changes
+    resulting in an engine restart! - this was causing a segmentation fault
+    crash on Linux.
+    :param callback: The callback to execute.
+    :param _: Accepts any args so that a callback might throw at it.
+    For example a menu callback will pass the menu state. We accept these
+    and ignore them.
+    """
+    # note that we use a single shot timer instead of cmds.evalDeferred as
+    # we were experiencing odd behaviour when the deferred command presented
+    # a modal dialog that then performed a file operation that resulted in a
+    # QMessageBox being shown - the deferred command would then run a second
+    # time, presumably from the event loop of the modal dialog from the
+    # first command!
+    #
+    # As the primary purpose of this method is to detach the executing code
+    # from the menu invocation, using a singleShot timer achieves this
+    # without the odd behaviour exhibited by evalDeferred.
+
+    QtCore.QTimer.singleShot(
+        0, functools.partial(_execute_within_exception_trap, callback)
+    )
+
+
+def _execute_within_exception_trap(callback):
+    """
+    Execute the callback and log any exception that gets raised which may otherwise have been
+    swallowed by the deferred execution of the callback.
+    """
+    try:
+        callback()
+    except Exception:
+        current_engine = tank.platform.current_engine()
+        current_engine.logger.exception("An exception was raised from Toolkit")
 
-    def __call__(self, *_):
-        """
-        Execute the callback deferred to avoid potential problems with the
-        command resulting in the menu being deleted, e.g. if the context changes
-        resulting in an engine restart! - this was causing a segmentation fault
-        crash on Linux.
-        :param _: Accepts any args so that a callback might throw at it.
-        For example a menu callback will pass the menu state. We accept these
-        and ignore them.
-        """
-        # note that we use a single shot timer instead of cmds.evalDeferred as
-        # we were experiencing odd behaviour when the deferred command presented
-        # a modal dialog that then performed a file operation that resulted in a
-        # QMessageBox being shown - the deferred command would then run a second
-        # time, presumably from the event loop of the modal dialog from the
-        # first command!
-        #
-        # As the primary purpose of this method is to detach the executing code
-        # from the menu invocation, using a singleShot timer achieves this
-        # without the odd behaviour exhibited by evalDeferred.
-
-        # This logic is implemented in the plugin_logic.py Callback class.
-
-        QtCore.QTimer.singleShot(0, self._execute_within_exception_trap)
-
-    def _execute_within_exception_trap(self):
-        """
-        Execute the callback and log any exception that gets raised which may otherwise have been
-        swallowed by the deferred execution of the callback.
-        """
-        try:
-            self.callback()
-        except Exception:
-            current_engine = tank.platform.current_engine()
-            current_engine.logger.exception("An exception was raised from Toolkit")
+
+def Callback(callback):
+    """
+    Returns a menu command executing the given callback deferred, see
+    _execute_deferred. Kept for the code still using the former Callback
+    class, it builds the same partial as the ones of the Shotgun menu.
+    """
+    return functools.partial(_execute_deferred, callback)
 
 
 class MenuGenerator(object):
@@ -101,6 +134,7 @@ class MenuGenerator(object):
         self._menu_def = None
         self._divider_id = 1
         self._menu_item_id = 1
+        self._app_instance_names = {}
 
     def create_menu(self, disabled=False):
         """
@@ -108,11 +142,14 @@ class MenuGenerator(object):
         In order to have commands enable/disable themselves based on the
         enable_callback, re-create the menu items every time.
         """
+        import IECore
+
         self._menu_def = IECore.MenuDefinition()
 
         if not disabled:
+            # the menu is built synchronously, there is no need to process
+            # events to show it disabled meanwhile
             self._engine.application_menu.setEnabled(False)
-            QtGui.QApplication.processEvents()
 
             # now add the context item on top of the main menu
             self._context_menu = self._add_context_menu(parent_menu="")
@@ -120,12 +157,15 @@ class MenuGenerator(object):
             # add menu divider
             self._add_divider(parent_menu="")
 
+            # only format the debug messages when they are going to be logged
+            logger = self._engine.logger
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
+
             # now enumerate all items and create menu objects for them
             menu_items = []
             for (cmd_name, cmd_details) in self._engine.commands.items():
-                self._engine.log_debug(
-                    "engine command: %s : %s" % (cmd_name, cmd_details)
-                )
+                if debug_enabled:
+                    logger.debug("engine command: %s : %s", cmd_name, cmd_details)
                 menu_items.append(
                     AppCommand(cmd_name, self, cmd_details, self._engine.logger)
                 )
@@ -133,23 +173,27 @@ class MenuGenerator(object):
             # sort list of commands in name order
             menu_items.sort(key=lambda x: x.name)
 
+            # reverse lookup of the app instance names, so each command can
+            # find the name of its app without scanning all the apps
+            self._app_instance_names = dict(
+                (id(app_instance_obj), app_instance_name)
+                for (app_instance_name, app_instance_obj) in self._engine.apps.items()
+            )
+
+            # index the commands so that favourites are found with a lookup
+            commands_by_key = dict(
+                ((cmd.get_app_instance_name(), cmd.name), cmd) for cmd in menu_items
+            )
+
             # now add favourites
             menu_favourites = self._engine.get_setting("menu_favourites")
             for fav in menu_favourites:
-                app_instance_name = fav["app_instance"]
-                menu_name = fav["name"]
-
-                # scan through all menu items
-                for cmd in menu_items:
-                    self._engine.log_debug("cmd: %s" % cmd.name)
-                    if (
-                        cmd.get_app_instance_name() == app_instance_name
-                        and cmd.name == menu_name
-                    ):
-                        # found our match!
-                        cmd.add_command_to_menu(menu="")
-                        # mark as a favourite item
-                        cmd.favourite = True
+                cmd = commands_by_key.get((fav["app_instance"], fav["name"]))
+                if cmd:
+                    # found our match!
+                    cmd.add_command_to_menu(menu="")
+                    # mark as a favourite item
+                    cmd.favourite = True
 
             # add menu divider
             if len(menu_favourites) > 0:
@@ -174,7 +218,8 @@ class MenuGenerator(object):
                         commands_by_app[app_name] = []
                     commands_by_app[app_name].append(cmd)
 
-            self._engine.log_debug("about to add app menu")
+            if debug_enabled:
+                logger.debug("about to add app menu")
 
             # now add all apps to main menu
             self._add_app_menu(commands_by_app)
@@ -191,13 +236,15 @@ class MenuGenerator(object):
     def _add_divider(self, parent_menu):
         self._divider_id += 1
         self._menu_def.append(
-            parent_menu + "/divider%s" % self._divider_id, {"divider": True}
+            "%s/divider%d" % (parent_menu, self._divider_id), {"divider": True}
         )
 
     def _add_sub_menu(self, menu_name, parent_menu):
         return parent_menu + "/" + menu_name
 
-    def _add_menu_item(self, name, parent_menu, callback, properties=None):
+    def _add_menu_item(
+        self, name, parent_menu, callback, properties=None, menu_def=None
+    ):
         self._menu_item_id += 1
         menu_description = {
             "command": Callback(callback) if callback else None,
@@ -210,15 +257,19 @@ class MenuGenerator(object):
                 menu_description["description"] = properties["tooltip"]
             if "short_cut" in properties:
                 menu_description["shortCut"] = properties["short_cut"]
+            # Gaffer evaluates callables when the menu is shown, so the
+            # callbacks only run for the menus the user actually opens
             if "enable_callback" in properties:
-                menu_description["active"] = properties["enable_callback"]()
+                menu_description["active"] = properties["enable_callback"]
             if "checkable" in properties:
-                menu_description["checkBox"] = properties.get("checkable")
+                menu_description["checkBox"] = properties["checkable"]
             elif "checkable_callback" in properties:
-                menu_description["checkBox"] = properties.get("checkable_callback")()
+                menu_description["checkBox"] = properties["checkable_callback"]
 
-        self._menu_def.append(
-            parent_menu + "/%s%d" % (name, self._menu_item_id), menu_description
+        if menu_def is None:
+            menu_def = self._menu_def
+        menu_def.append(
+            "%s/%s%d" % (parent_menu, name, self._menu_item_id), menu_description
         )
 
     def _add_context_menu(self, parent_menu):
@@ -262,26 +313,25 @@ class MenuGenerator(object):
         """
         Jump from context to FS
         """
-        # launch one window for each location on disk
+        # the command to run depends on the platform, find it out only once
+        if is_linux():
+            open_cmd = "xdg-open"
+        elif is_macos():
+            open_cmd = "open"
+        elif is_windows():
+            open_cmd = "explorer"
+        else:
+            raise Exception("Platform '%s' is not supported." % sys.platform)
+
+        # launch one window for each location on disk, without waiting for
+        # the file browser so that Gaffer does not freeze meanwhile
         paths = self._engine.context.filesystem_locations
         for disk_location in paths:
-
-            # get the setting
-            system = sys.platform
-
-            # run the app
-            if is_linux():
-                args = ["xdg-open", disk_location]
-            elif is_macos():
-                args = ['open "%s"', disk_location]
-            elif is_windows():
-                args = ["cmd.exe", "/C", "start", '"Folder %s"' % disk_location]
-            else:
-                raise Exception("Platform '%s' is not supported." % system)
-
-            exit_code = subprocess.check_output(args, shell=False)
-            if exit_code != 0:
-                self._engine.logger.error("Failed to launch '%s'!", args)
+            args = [open_cmd, disk_location]
+            try:
+                subprocess.Popen(args, close_fds=True)
+            except Exception:
+                self._engine.logger.exception("Failed to launch '%s'!", args)
 
     def _add_app_menu(self, commands_by_app):
         """
@@ -290,16 +340,18 @@ class MenuGenerator(object):
         for app_name in sorted(commands_by_app.keys()):
             if len(commands_by_app[app_name]) > 1:
                 # more than one menu entry fort his app
-                # make a sub menu and put all items in the sub menu
+                # make a sub menu and put all items in the sub menu, it is
+                # only built when the user opens it
                 app_menu = self._add_sub_menu(app_name, "")
 
-                # get the list of menu cmds for this app
+                # get the list of menu cmds for this app, already in
+                # alphabetical order as they were added from the sorted list
                 cmds = commands_by_app[app_name]
-                # make sure it is in alphabetical order
-                cmds.sort(key=lambda x: x.name)
 
-                for cmd in cmds:
-                    cmd.add_command_to_menu(app_menu)
+                self._menu_def.append(
+                    app_menu,
+                    {"subMenu": functools.partial(self._build_app_sub_menu, cmds)},
+                )
             else:
                 # this app only has a single entry.
                 # display that on the menu
@@ -309,6 +361,22 @@ class MenuGenerator(object):
                     cmd_obj.add_command_to_menu(menu="")
         self._add_divider(parent_menu="")
 
+    def _build_app_sub_menu(self, cmds):
+        """
+        Returns the menu definition holding the given commands of an app.
+        """
+        import IECore
+
+        menu_def = IECore.MenuDefinition()
+        for cmd in cmds:
+            cmd.add_command_to_menu(menu="", menu_def=menu_def)
+        return menu_def
+
+
+# marks the documentation url of a command as not looked up yet, None means
+# that the command has none
+_NOT_LOOKED_UP = object()
+
 
 class AppCommand(object):
     """
@@ -323,12 +391,18 @@ class AppCommand(object):
         self.favourite = False
         self.logger = logger
 
+        # the app and type of the command, looked up once as the getters are
+        # called several times while building the menu
+        self._app = self.properties.get("app")
+        self._type = self.properties.get("type", "default")
+        self._documentation_url_str = _NOT_LOOKED_UP
+
     def get_app_name(self):
         """
         Returns the name of the app that this command belongs to
         """
-        if "app" in self.properties:
-            return self.properties["app"].display_name
+        if self._app is not None:
+            return self._app.display_name
         return None
 
     def get_app_instance_name(self):
@@ -336,47 +410,54 @@ class AppCommand(object):
         Returns the name of the app instance, as defined in the environment.
         Returns None if not found.
         """
-        if "app" not in self.properties:
+        if self._app is None:
             return None
 
-        app_instance = self.properties["app"]
-        engine = app_instance.engine
-
-        for (app_instance_name, app_instance_obj) in engine.apps.items():
-            if app_instance_obj == app_instance:
-                # found our app!
-                return app_instance_name
-
-        return None
+        return self.parent._app_instance_names.get(id(self._app))
 
     def get_documentation_url_str(self):
         """
         Returns the documentation as a str
         """
-        if "app" in self.properties:
-            app = self.properties["app"]
-            doc_url = app.documentation_url
+        if self._documentation_url_str is _NOT_LOOKED_UP:
+            doc_url = None
+            if self._app is not None:
+                doc_url = self._app.documentation_url
             # deal with nuke's inability to handle unicode. #fail
-            if doc_url.__class__ == unicode:
-                doc_url = unicodedata.normalize("NFKD", doc_url).encode(
-                    "ascii", "ignore"
-                )
-            return doc_url
+            # Only a Python 2 unicode string or a Python 3 bytes string need
+            # converting, and only the unicode ones that are not plain ascii
+            # need their accents stripped.
+            if doc_url is None or isinstance(doc_url, str):
+                pass
+            elif isinstance(doc_url, bytes):
+                doc_url = doc_url.decode("ascii", "ignore")
+            else:
+                try:
+                    doc_url = doc_url.encode("ascii")
+                except UnicodeEncodeError:
+                    doc_url = unicodedata.normalize("NFKD", doc_url).encode(
+                        "ascii", "ignore"
+                    )
+            # remembered even when there is no url, so it is looked up once
+            self._documentation_url_str = doc_url
 
-        return None
+        return self._documentation_url_str
 
     def get_type(self):
         """
         returns the command type. Returns node, custom_pane or default
         """
-        return self.properties.get("type", "default")
+        return self._type
 
-    def add_command_to_menu(self, menu):
+    def add_command_to_menu(self, menu, menu_def=None):
         """
-        Adds an app command to the menu
+        Adds an app command to the menu, to the Shotgun menu definition unless
+        another menu definition is given
         """
 
-        self.parent._add_menu_item(self.name, menu, self.callback, self.properties)
+        self.parent._add_menu_item(
+            self.name, menu, self.callback, self.properties, menu_def=menu_def
+        )
 
         # # create menu sub-tree if need to:
         # # Support menu items seperated by '/'
@@ -60,7 +60,7 @@ class GafferLauncher(SoftwareLauncher):
     # matching against supplied versions and products. Similar to the glob
     # strings, these allow us to alter the regex matching for any of the
     # variable components of the path in one place
-    COMPONENT_REGEX_LOOKUP = {"version": r"\d+.\d+.\d+.\d+", "platform": r"\w+"}
+    COMPONENT_REGEX_LOOKUP = {"version": r"\d+\.\d+\.\d+\.\d+", "platform": r"\w+"}
 
     # This dictionary defines a list of executable template strings for each
     # of the supported operating systems. The templates are used for both
@@ -76,6 +76,10 @@ class GafferLauncher(SoftwareLauncher):
         "linux2": ["$GAFFER_BIN", "/opt/Gaffer-{version}-{platform}/bin/gaffer"],
     }
 
+    # executables found for each executable template by previous scans in
+    # this session, see _get_template_key
+    _found_software = {}
+
     @property
     def minimum_supported_version(self):
         """
@@ -96,19 +100,18 @@ class GafferLauncher(SoftwareLauncher):
         """
         required_env = {}
 
-        # Run the engine's init.py file when Gaffer starts up
-        startup_path = os.path.join(self.disk_location, "startup", "init.py")
-
         # Prepare the launch environment with variables required by the
         # classic bootstrap approach.
         self.logger.debug("Preparing Gaffer Launch via Toolkit Classic methodology ...")
 
+        startup_folder = os.path.join(self.disk_location, "startup")
+
         # Run the engine's init.py file when the application  starts up
-        startup_path = os.path.join(self.disk_location, "startup", "init.py")
+        startup_path = os.path.join(startup_folder, "init.py")
 
         required_env["SGTK_GAFFER_ENGINE_STARTUP"] = startup_path.replace("\\", "/")
 
-        gaffer_startup_path = os.path.join(self.disk_location, "startup", "gaffer")
+        gaffer_startup_path = os.path.join(startup_folder, "gaffer")
         sgtk.util.append_path_to_env_var("GAFFER_STARTUP_PATHS", gaffer_startup_path)
 
         required_env["SGTK_GAFFER_MODULE_PATH"] = sgtk.get_sgtk_module_path().replace(
@@ -149,8 +152,10 @@ class GafferLauncher(SoftwareLauncher):
         """
         self.logger.debug("Scanning for Gaffer executables...")
 
+        sw_versions = self._find_software()
+
         supported_sw_versions = []
-        for sw_version in self._find_software():
+        for sw_version in sw_versions:
             (supported, reason) = self._is_supported(sw_version)
             if supported:
                 supported_sw_versions.append(sw_version)
@@ -161,6 +166,23 @@ class GafferLauncher(SoftwareLauncher):
 
         return supported_sw_versions
 
+    def _get_template_key(self, executable_template, extra_args):
+        """
+        Returns what the executables found for the given expanded executable
+        template depend on: the engine location, the extra arguments, the
+        template itself and the modification time of the folder it is
+        searched in, which changes when a Gaffer version is installed or
+        removed there.
+        """
+        # the folder listed to match the first variable part of the path
+        folder = os.path.dirname(executable_template.split("{", 1)[0])
+        try:
+            folder_mtime = os.path.getmtime(folder)
+        except OSError:
+            folder_mtime = None
+
+        return (self.disk_location, extra_args, executable_template, folder_mtime)
+
     def _find_software(self):
         """
         Find executables in the default install locations.
@@ -179,35 +201,72 @@ class GafferLauncher(SoftwareLauncher):
         # to because the engine class has not even been instantiated yet.
         extra_args = os.environ.get("SGTK_GAFFER_CMD_EXTRA_ARGS")
 
+        # all the executables found share the engine icon
+        icon = self._icon_from_engine()
+
         for executable_template in executable_templates:
+            # an executable set explicitly through an environment variable,
+            # like $GAFFER_BIN, is the user's choice over the install locations
+            from_env = executable_template.startswith("$")
+
             executable_template = os.path.expanduser(executable_template)
             executable_template = os.path.expandvars(executable_template)
 
             self.logger.debug("Processing template %s.", executable_template)
 
-            executable_matches = self._glob_and_match(
-                executable_template, self.COMPONENT_REGEX_LOOKUP
-            )
+            # only look for the executables again if the folder they are
+            # found in has changed since the last scan, or one of them is gone
+            # from a version folder that is still there
+            template_key = self._get_template_key(executable_template, extra_args)
+            template_sw_versions = self._found_software.get(template_key)
+            if template_sw_versions is None or not all(
+                os.path.exists(sw_version.path) for sw_version in template_sw_versions
+            ):
+                template_sw_versions = self._find_template_software(
+                    executable_template, extra_args, icon
+                )
+                GafferLauncher._found_software[template_key] = template_sw_versions
+
+            sw_versions.extend(template_sw_versions)
+
+            # no need to scan the install locations when the executable the
+            # user chose can be launched. This depends on the versions and
+            # products this launcher is restricted to, so it is not cached
+            if from_env and any(
+                self._is_supported(sw_version)[0] for sw_version in template_sw_versions
+            ):
+                break
 
-            # Extract all products from that executable.
-            for (executable_path, key_dict) in executable_matches:
-
-                # extract the matched keys form the key_dict (default to None
-                # if not included)
-                executable_version = key_dict.get("version")
-
-                args = []
-                if extra_args:
-                    args.append(extra_args)
-
-                sw_versions.append(
-                    SoftwareVersion(
-                        executable_version,
-                        APPLICATION_NAME,
-                        executable_path,
-                        icon=self._icon_from_engine(),
-                        args=args,
-                    )
+        return sw_versions
+
+    def _find_template_software(self, executable_template, extra_args, icon):
+        """
+        Find the executables matching the given expanded executable template.
+        """
+        executable_matches = self._glob_and_match(
+            executable_template, self.COMPONENT_REGEX_LOOKUP
+        )
+
+        # Extract all products from that executable.
+        sw_versions = []
+        for (executable_path, key_dict) in executable_matches:
+
+            # extract the matched keys form the key_dict (default to None
+            # if not included)
+            executable_version = key_dict.get("version")
+
+            args = []
+            if extra_args:
+                args.append(extra_args)
+
+            sw_versions.append(
+                SoftwareVersion(
+                    executable_version,
+                    APPLICATION_NAME,
+                    executable_path,
+                    icon=icon,
+                    args=args,
                 )
+            )
 
         return sw_versions
@@ -90,22 +90,37 @@ def check_ui_finished_loading(*args, **kwargs):
         )
 
 
-def bootstrap():
-    engine_startup_path = os.environ.get("SGTK_GAFFER_ENGINE_STARTUP")
-    if sys.version_info[0:2] >= (3, 4):
-        import importlib
+# name the engine startup script is loaded as, see bootstrap
+ENGINE_STARTUP_MODULE_NAME = "sgtk_gaffer_engine_startup"
 
-        engine_module_spec = importlib.util.spec_from_file_location(
-            "sgtk_gaffer_engine_startup", engine_startup_path
-        )
-        engine_startup = importlib.util.module_from_spec(engine_module_spec)
-        engine_module_spec.loader.exec_module(engine_startup)
-    else:
-        import imp
+# whether Toolkit has already been started from this Gaffer session
+_bootstrapped = False
 
-        engine_startup = imp.load_source(
-            "sgtk_gaffer_engine_startup", engine_startup_path
-        )
+
+def bootstrap():
+    global _bootstrapped
+    if _bootstrapped:
+        return
+    _bootstrapped = True
+
+    engine_startup = sys.modules.get(ENGINE_STARTUP_MODULE_NAME)
+    if engine_startup is None:
+        engine_startup_path = os.environ.get("SGTK_GAFFER_ENGINE_STARTUP")
+        if sys.version_info[0:2] >= (3, 4):
+            import importlib.util
+
+            engine_module_spec = importlib.util.spec_from_file_location(
+                ENGINE_STARTUP_MODULE_NAME, engine_startup_path
+            )
+            engine_startup = importlib.util.module_from_spec(engine_module_spec)
+            engine_module_spec.loader.exec_module(engine_startup)
+            sys.modules[ENGINE_STARTUP_MODULE_NAME] = engine_startup
+        else:
+            import imp
+
+            engine_startup = imp.load_source(
+                ENGINE_STARTUP_MODULE_NAME, engine_startup_path
+            )
 
     # Fire up Toolkit and the environment engine when there's time.
     engine_startup.start_toolkit(application)
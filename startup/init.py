@@ -18,8 +18,6 @@ It sets up the Toolkit context and prepares the engine.
 
 import os
 import sys
-import traceback
-import platform
 
 __author__ = "Diego Garcia Huerta"
 __contact__ = "https://www.linkedin.com/in/diegogh/"
@@ -27,16 +25,26 @@ __contact__ = "https://www.linkedin.com/in/diegogh/"
 
 ENGINE_NAME = "tk-gaffer"
 
-DIR_PATH = os.path.dirname(os.path.abspath(__file__))
+# Gaffer runs its startup files from the absolute paths they are found in,
+# only fall back to resolving the path against the current folder otherwise
+if os.path.isabs(__file__):
+    DIR_PATH = os.path.dirname(__file__)
+else:
+    DIR_PATH = os.path.dirname(os.path.abspath(__file__))
 
-try:
-    import sqlite3
-except ImportError:
-    py_version = platform.python_version_tuple()
-    py_resources_path = os.path.join(DIR_PATH, "resources", "python")
-    sys.path.insert(
-        0, os.path.join(py_resources_path, sys.platform, ".".join(py_version))
-    )
+# nothing to check if this file was run before and sqlite3 is already loaded
+if "sqlite3" not in sys.modules:
+    try:
+        import sqlite3
+    except ImportError:
+        # only add the bundled sqlite3 to the path when there is one for this
+        # platform and Python version, every import afterwards searches it
+        py_version = "%d.%d.%d" % sys.version_info[:3]
+        py_resources_path = os.path.join(
+            DIR_PATH, "resources", "python", sys.platform, py_version
+        )
+        if os.path.isdir(py_resources_path) and py_resources_path not in sys.path:
+            sys.path.insert(0, py_resources_path)
 
 try:
     import sgtk
@@ -47,16 +55,30 @@ except ImportError as e:
 logger = sgtk.LogManager.get_logger(__name__)
 
 
+# temporary environment variables used to pass the startup data to this file
+_SGTK_ENV_VARS = (
+    "SGTK_ENGINE",
+    "SGTK_CONTEXT",
+    "SGTK_FILE_TO_OPEN",
+    "SGTK_FILES_TO_OPEN",
+)
+
+# the start of the messages displayed by the display_* functions
+_ERROR_PREFIX = "Shotgun Error | %s | " % ENGINE_NAME
+_WARNING_PREFIX = "Shotgun Warning | %s | " % ENGINE_NAME
+_INFO_PREFIX = "Shotgun Info | %s | " % ENGINE_NAME
+
+
 def display_error(msg):
-    print("Shotgun Error | %s | %s " % (ENGINE_NAME, msg))
+    print("%s%s " % (_ERROR_PREFIX, msg))
 
 
 def display_warning(msg):
-    print("Shotgun Warning | %s | %s " % (ENGINE_NAME, msg))
+    print("%s%s " % (_WARNING_PREFIX, msg))
 
 
 def display_info(msg):
-    print("Shotgun Info | %s | %s " % (ENGINE_NAME, msg))
+    print("%s%s " % (_INFO_PREFIX, msg))
 
 
 def start_toolkit_classic(application):
@@ -68,15 +90,16 @@ def start_toolkit_classic(application):
 
     logger.debug("Launching toolkit in classic mode.")
 
-    # Get the name of the engine to start from the environement
+    # Get the name of the engine to start and the context to load from the
+    # environement
     env_engine = os.environ.get("SGTK_ENGINE")
+    env_context = os.environ.get("SGTK_CONTEXT")
+
     if not env_engine:
         msg = "Shotgun: Missing required environment variable SGTK_ENGINE."
         display_error(msg)
         return
 
-    # Get the context load from the environment.
-    env_context = os.environ.get("SGTK_CONTEXT")
     if not env_context:
         msg = "Shotgun: Missing required environment variable SGTK_CONTEXT."
         display_error(msg)
@@ -89,24 +112,23 @@ def start_toolkit_classic(application):
             "Shotgun: Could not create context! Shotgun Pipeline Toolkit"
             " will be disabled. Details: %s" % e
         )
-        etype, value, tb = sys.exc_info()
-        msg += "".join(traceback.format_exception(etype, value, tb))
         display_error(msg)
+        # the traceback is only written, and formatted, with debug logging on
+        logger.debug("Could not deserialize the context %s", env_context, exc_info=True)
         return
 
     try:
         # Start up the toolkit engine from the environment data
         logger.debug(
-            "Launching engine instance '%s' for context %s" % (env_engine, env_context)
+            "Launching engine instance '%s' for context %s", env_engine, env_context
         )
 
         engine = sgtk.platform.start_engine(env_engine, context.sgtk, context)
         engine.set_application(application)
     except Exception as e:
         msg = "Shotgun: Could not start engine. Details: %s" % e
-        etype, value, tb = sys.exc_info()
-        msg += "".join(traceback.format_exception(etype, value, tb))
         display_error(msg)
+        logger.debug("Could not start the engine %s", env_engine, exc_info=True)
         return
 
 
@@ -116,45 +138,77 @@ def start_toolkit(application):
     environment variables.
     """
 
-    # Verify sgtk can be loaded.
-    try:
-        import sgtk
-    except Exception as e:
-        msg = "Shotgun: Could not import sgtk! Disabling for now: %s" % e
-        display_error(msg)
-        return
-
     # start up toolkit logging to file
     sgtk.LogManager().initialize_base_file_handler(ENGINE_NAME)
 
     # Rely on the classic boostrapping method
     start_toolkit_classic(application)
 
-    # Check if a file was specified to open and open it.
-    file_to_open = os.environ.get("SGTK_FILE_TO_OPEN")
-    if file_to_open:
-        msg = "Shotgun: Opening '%s'..." % file_to_open
-        display_info(msg)
-
+    # Check if files were specified to open and open them, either a single
+    # one or a list of them separated by os.pathsep. Each file is only opened
+    # once, in the order given, even if both variables list it
+    paths = [os.environ.get("SGTK_FILE_TO_OPEN", "")]
+    paths.extend(os.environ.get("SGTK_FILES_TO_OPEN", "").split(os.pathsep))
+
+    files_to_open = []
+    seen_paths = set()
+    for path in paths:
+        if not path:
+            continue
+        normalized_path = os.path.normcase(os.path.normpath(path))
+        if normalized_path not in seen_paths:
+            seen_paths.add(normalized_path)
+            files_to_open.append(path)
+
+    if files_to_open:
+        for file_to_open in files_to_open:
+            msg = "Shotgun: Opening '%s'..." % file_to_open
+            display_info(msg)
+
+        # imported here rather than in the idle callback, so that opening the
+        # file does not stall the UI thread importing modules
+        import Gaffer
         import GafferUI
-        import functools
-
-        def addScript(file_path):
-            import Gaffer
-            import GafferUI.FileMenu
+        import GafferUI.FileMenu
 
+        def addScripts(file_paths):
+            # all the files replace the script Gaffer started with, in a
+            # single idle callback
             currentScript = application.root()["scripts"][-1]
             currentWindow = GafferUI.ScriptWindow.acquire(currentScript)
-
-            GafferUI.FileMenu.addScript(application.root(), file_path, asNew=False)
-
-            application.root()["scripts"].removeChild(currentScript)
-            GafferUI.WidgetAlgo.keepUntilIdle(currentWindow)
-
-        GafferUI.EventLoop.addIdleCallback(functools.partial(addScript, file_to_open))
+            file_paths = list(file_paths)
+
+            # if the script Gaffer started with is still empty, load the first
+            # file into it rather than building a new script and window only
+            # to tear down the current ones. Unless there is a backup to
+            # recover the file from, FileMenu.addScript offers to load it
+            reuse_script = not currentScript["fileName"].getValue() and not (
+                currentScript.children(Gaffer.Node)
+            )
+            if reuse_script:
+                backups = GafferUI.Backups.acquire(application, createIfNecessary=False)
+                if backups is not None and backups.recoveryFile(file_paths[0]):
+                    reuse_script = False
+            if reuse_script:
+                file_path = file_paths.pop(0)
+                currentScript["fileName"].setValue(file_path)
+                with GafferUI.ErrorDialogue.ErrorHandler(
+                    title="Errors Occurred During Loading",
+                    parentWindow=currentWindow,
+                ):
+                    currentScript.load(continueOnError=True)
+                GafferUI.FileMenu.addRecentFile(application, file_path)
+                currentScript = None
+
+            for file_path in file_paths:
+                GafferUI.FileMenu.addScript(application.root(), file_path, asNew=False)
+
+            if currentScript is not None:
+                application.root()["scripts"].removeChild(currentScript)
+                GafferUI.WidgetAlgo.keepUntilIdle(currentWindow)
+
+        GafferUI.EventLoop.addIdleCallback(lambda: addScripts(files_to_open))
 
     # Clean up temp env variables.
-    del_vars = ["SGTK_ENGINE", "SGTK_CONTEXT", "SGTK_FILE_TO_OPEN"]
-    for var in del_vars:
-        if var in os.environ:
-            del os.environ[var]
+    for var in _SGTK_ENV_VARS:
+        os.environ.pop(var, None)